@@ -0,0 +1,295 @@
+import argparse
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from algorithms import ALGORITHMS
+from sweep import (
+    collect_results,
+    init_worker,
+    run_task,
+    save_failures,
+    save_results,
+    task_outcome,
+)
+from utils import (
+    EDGES_DENSITY,
+    EXACT_ALGORITHMS,
+    K_VALUES,
+    SWEEP_SIZES,
+    log,
+    append_checkpoint,
+    checkpoint_path,
+    load_checkpoint,
+    load_reference_results,
+    time_limit,
+)
+
+# Grelha inicial: um em cada COARSE_STEP tamanhos de SWEEP_SIZES
+COARSE_STEP = 10
+# Tamanhos da grelha inicial acrescentados a cada série por ronda
+EXTEND = 4
+# Pontos usados no ajuste log(tempo) ~ log(n) de cada série (os maiores)
+FIT_POINTS = 6
+MIN_FIT_POINTS = 3
+# Uma célula só é saltada se o tempo previsto exceder o limite por este fator
+PREDICTION_MARGIN = 2.0
+# Desvio (em fator) das operações de um tamanho face à interpolação log-log dos
+# vizinhos a partir do qual se refina a grelha à sua volta
+REFINE_TOLERANCE = 4.0
+
+
+class CostModel:
+    """Tempo previsto de cada célula, aprendido com as células já terminadas.
+
+    Em cada série (algoritmo, k, densidade) ajusta log(tempo) = a + b log(n) aos
+    maiores tamanhos; sem pontos suficientes usa um ajuste do algoritmo inteiro
+    em log(n), k e densidade.
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.series = {}
+        self.pooled = {}
+
+    def update(self, name):
+        # Recalcula os ajustes de name depois de novas células terminadas
+        points = defaultdict(list)
+        for (k, max_edges, size), cell in self.cells[name].items():
+            # Células derivadas de outro k (ver run.run_all_k) não têm tempo próprio
+            if "derived_from" in cell:
+                continue
+            if not cell.get("timed_out") and cell["time"] > 0 and size > 1:
+                points[(k, max_edges)].append((size, cell["time"]))
+
+        rows = []
+        for (k, max_edges), series in points.items():
+            sizes, times = np.log(np.array(sorted(series)[-FIT_POINTS:])).T
+            if len(sizes) >= MIN_FIT_POINTS and np.ptp(sizes) > 0:
+                self.series[(name, k, max_edges)] = np.polyfit(sizes, times, 1)
+            rows.extend((np.log(size), k, max_edges, np.log(t)) for size, t in series)
+
+        if len(rows) > 4:
+            rows = np.array(rows)
+            features = np.column_stack([np.ones(len(rows)), rows[:, :3]])
+            self.pooled[name] = np.linalg.lstsq(features, rows[:, 3], rcond=None)[0]
+
+    def predict(self, name, k, max_edges, size):
+        """Tempo previsto em segundos, ou None sem dados suficientes."""
+        if (name, k, max_edges) in self.series:
+            return float(
+                np.exp(np.polyval(self.series[(name, k, max_edges)], np.log(size)))
+            )
+        if name in self.pooled:
+            return float(np.exp(self.pooled[name] @ [1, np.log(size), k, max_edges]))
+        return None
+
+
+def coarse_grid(k):
+    sizes = {k, *SWEEP_SIZES[::COARSE_STEP], SWEEP_SIZES[-1]}
+    return sorted(size for size in sizes if size >= k)
+
+
+def midpoint(a, b):
+    # Tamanho da grelha completa a meio de (a, b), ou None se já não houver nenhum
+    inside = [size for size in SWEEP_SIZES if a < size < b]
+    return inside[len(inside) // 2] if inside else None
+
+
+def refinements(cells, k, max_edges, exact):
+    """Tamanhos a acrescentar entre células terminadas de uma série.
+
+    Refina onde o clique passa a existir (ou deixa de existir), entre o último
+    tamanho terminado e o primeiro timeout e, nos algoritmos exatos, à volta
+    dos tamanhos cujas operações se afastam mais de REFINE_TOLERANCE vezes da
+    interpolação log-log entre os vizinhos.
+    """
+    series = sorted(
+        (size, cell)
+        for (k_, max_edges_, size), cell in cells.items()
+        if (k_, max_edges_) == (k, max_edges)
+    )
+    timeouts = [size for size, cell in series if cell.get("timed_out")]
+    series = [
+        (size, cell)
+        for size, cell in series
+        if not cell.get("timed_out") and "derived_from" not in cell
+    ]
+    sizes = [size for size, _ in series]
+    found = [cell["result"] is not None for _, cell in series]
+    operations = np.log(np.maximum([cell["operations_count"] for _, cell in series], 1))
+
+    intervals = set()
+    for i in range(len(series) - 1):
+        if found[i] != found[i + 1]:
+            intervals.add(i)
+    if exact and len(series) > 2:
+        x = np.log(sizes)
+        weight = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        expected = operations[:-2] + weight * (operations[2:] - operations[:-2])
+        deviation = np.abs(operations[1:-1] - expected)
+        for i in np.flatnonzero(deviation > np.log(REFINE_TOLERANCE)):
+            intervals.update((i, i + 1))
+
+    points = [midpoint(sizes[i], sizes[i + 1]) for i in intervals]
+    # Bissecção até ao primeiro timeout, para manter o maior tamanho resolvido
+    if timeouts:
+        finished = [size for size in sizes if size < min(timeouts)]
+        points.append(midpoint(max(finished, default=k - 1), min(timeouts)))
+    return {size for size in points if size is not None}
+
+
+def adaptive_sweep(
+    names,
+    workers=None,
+    k_values=K_VALUES,
+    densities=EDGES_DENSITY,
+    backend="networkx",
+    k_core_prefilter=False,
+    profile_dir=None,
+):
+    """Como sweep.parallel_sweep, mas com uma grelha de tamanhos adaptativa.
+
+    Começa por uma grelha grosseira (partilhada pelos algoritmos de cada k e
+    densidade, para que os resultados continuem comparáveis), salta as células
+    que o CostModel prevê que esgotem o tempo, corre primeiro as mais demoradas
+    e refina a grelha onde o comportamento muda (ver refinements).
+    """
+    cells = {
+        name: load_checkpoint(checkpoint_path(name, backend, k_core_prefilter))
+        for name in names
+    }
+    model = CostModel(cells)
+    for name in names:
+        model.update(name)
+
+    # Tamanhos escolhidos para cada (k, densidade) e primeiro tamanho que não se corre
+    grid = {(k, max_edges): set() for k in k_values for max_edges in densities}
+    stop = {}
+    for name in names:
+        for (k, max_edges, size), cell in cells[name].items():
+            if (k, max_edges) in grid:
+                grid[(k, max_edges)].add(size)
+            if cell.get("timed_out"):
+                key = (name, k, max_edges)
+                stop[key] = min(size, stop.get(key, size))
+
+    skipped = 0
+    failures = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(backend, k_core_prefilter, profile_dir),
+    ) as executor:
+        while True:
+            for (k, max_edges), sizes in grid.items():
+                # Prolonga a grelha grosseira enquanto algum algoritmo ainda a percorre
+                largest = max(sizes, default=0)
+                limit = max(stop.get((name, k, max_edges), np.inf) for name in names)
+                sizes.update(
+                    [s for s in coarse_grid(k) if largest < s < limit][:EXTEND]
+                )
+                for name in names:
+                    sizes.update(
+                        refinements(cells[name], k, max_edges, name in EXACT_ALGORITHMS)
+                    )
+
+            tasks = []
+            for (k, max_edges), sizes in grid.items():
+                for name in names:
+                    key = (name, k, max_edges)
+                    for size in sorted(sizes):
+                        if (k, max_edges, size) in cells[name]:
+                            continue
+                        # Tarefas que falharam não se repetem nesta execução
+                        if (name, k, max_edges, size) in failures:
+                            continue
+                        if size >= stop.get(key, np.inf):
+                            break
+                        seconds = time_limit(name, size)
+                        cost = model.predict(name, k, max_edges, size)
+                        if seconds and cost and cost > PREDICTION_MARGIN * seconds:
+                            log.info(
+                                f"Skipping {name} from size {size}, clique size {k}, and density of edges {max_edges}: predicted {cost:.1f}s"
+                            )
+                            stop[key] = size
+                            skipped += 1
+                            break
+                        tasks.append((cost or 0, size, (name, k, max_edges, size)))
+            if not tasks:
+                break
+
+            # Mais demoradas primeiro (LPT): os trabalhadores acabam todos perto do fim
+            tasks.sort(reverse=True)
+            futures = {executor.submit(run_task, task): task for _, _, task in tasks}
+            pending = defaultdict(list)
+            for future, task in futures.items():
+                pending[task[:3]].append((task[3], future))
+
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                outcome = task_outcome(future, futures[future], failures)
+                if outcome is None:
+                    continue
+                (name, k, max_edges, size), cell = outcome
+                cells[name][(k, max_edges, size)] = cell
+                append_checkpoint(
+                    checkpoint_path(name, backend, k_core_prefilter),
+                    (k, max_edges, size),
+                    cell,
+                )
+                if cell.get("timed_out"):
+                    log.warning(
+                        f"{name} algorithm timed out for graph with size {size}, clique size {k}, and density of edges {max_edges}"
+                    )
+                    key = (name, k, max_edges)
+                    stop[key] = min(size, stop.get(key, size))
+                    for other_size, other_future in pending[key]:
+                        if other_size > size:
+                            other_future.cancel()
+            for name in names:
+                model.update(name)
+
+    save_failures(failures)
+
+    total = sum(len(cells[name]) for name in names)
+    log.info(f"Adaptive sweep finished: {total} cells run, {skipped} series cut short")
+
+    all_results = {}
+    for name in names:
+        if name in EXACT_ALGORITHMS:
+            results_exhaustive = {}
+        elif any(exact in names for exact in EXACT_ALGORITHMS):
+            exact = [e for e in reversed(EXACT_ALGORITHMS) if e in names][0]
+            results_exhaustive = collect_results(exact, cells[exact], {})
+        else:
+            results_exhaustive = load_reference_results()
+        all_results[name] = collect_results(name, cells[name], results_exhaustive)
+    return all_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Corre a grelha k x densidade x tamanho com refinamento adaptativo"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS)
+    )
+    parser.add_argument("--backend", default="networkx", choices=["networkx", "bitset"])
+    parser.add_argument("--k-core", action="store_true")
+    parser.add_argument("--profile-dir")
+    args = parser.parse_args()
+
+    save_results(
+        adaptive_sweep(
+            args.algorithms,
+            workers=args.workers,
+            backend=args.backend,
+            k_core_prefilter=args.k_core,
+            profile_dir=args.profile_dir,
+        ),
+        args.backend,
+        args.k_core,
+    )
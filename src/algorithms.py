@@ -1,25 +1,75 @@
+import heapq
 import itertools
+import math
 import random
-from utils import benchmark
+import numpy as np
+from time import perf_counter
+from utils import (
+    EXACT_ALGORITHMS,
+    Deadline,
+    MaximumCliqueResult,
+    Result,
+    batch_mode,
+    benchmark,
+)
+from profiling import count, phase
+from bitset_graph import (
+    BitsetGraph,
+    as_bitset_graph,
+    check_deadline,
+    coloring_order,
+    dense_adjacency,
+    greedy_coloring_bound,
+    nth_set_bit,
+    random_set_bit,
+)
+
+# Peso mínimo de um vértice no modo adaptativo de randomized_heuristic_clique
+MIN_WEIGHT = 1e-6
+# A pesquisa exaustiva consulta o Deadline a cada DEADLINE_STRIDE subconjuntos
+DEADLINE_STRIDE = 1024
+# Primeiro lote do modo em lote; os seguintes duplicam até batch_size, para que as
+# células fáceis (clique logo nas primeiras amostras) não paguem um lote inteiro
+FIRST_BATCH = 32
+
+# Todos os algoritmos aceitam deadline (ver utils.Deadline): quando expira, devolvem
+# o trabalho feito até aí num Result com timed_out=True (também quando o prazo expira
+# numa fase de preparação, que o sinaliza com TimeoutError). As fases marcadas com
+# phase(...) só são medidas dentro de profiling.collect_phases(). Ficam de fora do
+# corpo de cada tentativa, demasiado curto para o custo de phase mesmo desligado:
+# esse tempo aparece por função no cProfile da célula (profiling.profile_call)
 
 
 def is_clique(graph, subset):
+    if isinstance(graph, BitsetGraph):
+        return graph.is_clique(subset)
     return all(graph.has_edge(u, v) for u, v in itertools.combinations(subset, 2))
 
 
+def first_missing_edge(graph, subset):
+    for u, v in itertools.combinations(subset, 2):
+        if not graph.has_edge(u, v):
+            return u, v
+    return None
+
+
 def is_small_graph(nodes, clique_size):
     return len(nodes) < clique_size
 
 
 @benchmark
-def exhaustive_clique_search(graph, clique_size):
+def exhaustive_clique_search(graph, clique_size, deadline=None):
+    deadline = deadline or Deadline()
     node_list = list(graph.nodes)
     solutions_tested = 0
     operations_count = 0
+    pair_count = clique_size * (clique_size - 1) // 2
 
     for subset in itertools.combinations(node_list, clique_size):
+        if solutions_tested % DEADLINE_STRIDE == 0 and deadline.expired():
+            break
         solutions_tested += 1
-        operations_count += 1 + sum(1 for _ in itertools.combinations(subset, 2))
+        operations_count += 1 + pair_count
         if is_clique(graph, subset):
             return subset, operations_count, solutions_tested
 
@@ -27,101 +77,379 @@ def exhaustive_clique_search(graph, clique_size):
 
 
 @benchmark
-def random_sampling_clique(graph, clique_size, num_trials=1000):
+def branch_and_bound_clique_search(graph, clique_size, deadline=None):
+    deadline = deadline or Deadline()
+    try:
+        with phase("conversion"):
+            bitset = as_bitset_graph(graph, deadline)
+    except TimeoutError:
+        return None, 0, 0
+    masks = bitset.masks
+
+    if is_small_graph(bitset.node_list, clique_size):
+        return None, 0, 0
+
+    operations_count = 0
+    solutions_tested = 0
+
+    def expand(clique, candidates):
+        nonlocal operations_count, solutions_tested
+        if deadline.expired():
+            return None
+        solutions_tested += 1
+        if len(clique) == clique_size:
+            return clique
+
+        needed = clique_size - len(clique)
+        operations_count += candidates.bit_count()
+        with phase("coloring_bound"):
+            bound = greedy_coloring_bound(masks, candidates, needed)
+        if bound < needed:
+            return None
+
+        # Pivô com mais vizinhos entre os candidatos (Tomita)
+        with phase("pivot"):
+            pivot_neighbors = 0
+            best_count = -1
+            remaining = candidates
+            while remaining:
+                low = remaining & -remaining
+                common = candidates & masks[low.bit_length() - 1]
+                if common.bit_count() > best_count:
+                    best_count = common.bit_count()
+                    pivot_neighbors = common
+                remaining ^= low
+        operations_count += candidates.bit_count()
+
+        # Qualquer clique maximal contém o pivô ou um não-vizinho dele
+        branches = candidates & ~pivot_neighbors
+        while branches:
+            low = branches & -branches
+            v = low.bit_length() - 1
+            operations_count += 1
+            found = expand(clique + [v], candidates & masks[v])
+            if found:
+                return found
+            if deadline.triggered:
+                return None
+            candidates ^= low
+            branches ^= low
+            if candidates.bit_count() < needed:
+                return None
+        return None
+
+    try:
+        with phase("ordering"):
+            order, core = bitset.degeneracy(deadline)
+    except TimeoutError:
+        return None, operations_count, solutions_tested
+    operations_count += len(order)
+
+    # Cada clique é procurado a partir do seu primeiro vértice na ordem de degenerescência
+    later = (1 << len(order)) - 1
+    for v in order:
+        if deadline.expired():
+            break
+        later &= ~(1 << v)
+        if core[v] + 1 < clique_size:
+            continue
+        candidates = masks[v] & later
+        operations_count += 1
+        if candidates.bit_count() + 1 < clique_size:
+            continue
+        found = expand([v], candidates)
+        if found:
+            return (
+                tuple(bitset.node_list[i] for i in sorted(found)),
+                operations_count,
+                solutions_tested,
+            )
+
+    return None, operations_count, solutions_tested
+
+
+@benchmark
+def random_sampling_clique(
+    graph, clique_size, num_trials=1000, batch_size=None, deadline=None
+):
+    deadline = deadline or Deadline()
     node_list = list(graph.nodes)
 
     if is_small_graph(node_list, clique_size):
         return None, 0, 0
 
+    if batch_mode(len(node_list), clique_size, batch_size):
+        return batch_random_sampling(
+            graph, node_list, clique_size, num_trials, batch_size, deadline
+        )
+
     operations_count = 0
     solutions_tested = 0
+    pair_count = clique_size * (clique_size - 1) // 2
+    budget = 150 * graph.size() ** 2 + 100000
 
     for _ in range(num_trials):
-        if operations_count > 150 * graph.size() ** 2 + 100000:
+        if operations_count > budget or deadline.expired():
             break
         subset = random.sample(node_list, clique_size)
         solutions_tested += 1
-        operations_count += 1 + sum(1 for _ in itertools.combinations(subset, 2))
+        operations_count += 1 + pair_count
         if is_clique(graph, subset):
             return subset, operations_count, solutions_tested
 
     return None, operations_count, solutions_tested
 
 
+def sample_subsets(rng, n, k, rows):
+    """rows k-subconjuntos uniformes de range(n), sem vértices repetidos, um por linha."""
+    if n <= k * k:
+        # Poucos vértices: as k primeiras posições de uma ordem aleatória de cada linha
+        return np.argpartition(rng.random((rows, n)), k - 1, axis=1)[:, :k]
+    # Com n >= k^2 a maioria das linhas não repete vértices: só as outras são redesenhadas
+    samples = rng.integers(0, n, (rows, k))
+    while True:
+        ordered = np.sort(samples, axis=1)
+        repeated = (np.diff(ordered, axis=1) == 0).any(axis=1)
+        if not repeated.any():
+            return samples
+        samples[repeated] = rng.integers(0, n, (int(repeated.sum()), k))
+
+
+def batch_random_sampling(
+    graph, node_list, clique_size, num_trials, batch_size, deadline
+):
+    # Cada tentativa custa 1 + C(k, 2) operações; o ciclo sequencial pára quando o
+    # orçamento é ultrapassado, o que fixa à partida o número máximo de tentativas
+    cost = 1 + clique_size * (clique_size - 1) // 2
+    max_trials = min(num_trials, (150 * graph.size() ** 2 + 100000) // cost + 1)
+
+    try:
+        with phase("adjacency"):
+            adjacency = dense_adjacency(graph, deadline)
+    except TimeoutError:
+        return None, 0, 0
+    rng = np.random.default_rng(random.getrandbits(64))
+    solutions_tested = 0
+    rows = min(FIRST_BATCH, batch_size)
+
+    while solutions_tested < max_trials and not deadline.expired():
+        with phase("sample"):
+            samples = sample_subsets(
+                rng,
+                len(node_list),
+                clique_size,
+                min(rows, max_trials - solutions_tested),
+            )
+        rows = min(2 * rows, batch_size)
+
+        with phase("is_clique"):
+            cliques = adjacency[samples[:, :, None], samples[:, None, :]].all(
+                axis=(1, 2)
+            )
+        hits = np.flatnonzero(cliques)
+        if hits.size:
+            solutions_tested += int(hits[0]) + 1
+            subset = [node_list[i] for i in samples[hits[0]].tolist()]
+            return subset, solutions_tested * cost, solutions_tested
+        solutions_tested += len(samples)
+
+    return None, solutions_tested * cost, solutions_tested
+
+
+def bitset_monte_carlo(graph, clique_size, num_trials, report_largest, deadline):
+    # monte_carlo_clique sobre um BitsetGraph: os candidatos são a máscara dos
+    # vizinhos comuns, atualizada com um AND em vez de filtrar uma lista
+    masks = graph.masks
+    n = len(masks)
+    operations_count = 0
+    solutions_tested = 0
+    budget = 150 * graph.size() ** 2 + 100000
+    target_size = n if report_largest else clique_size
+    largest = None
+
+    for _ in range(num_trials):
+        if operations_count > budget or deadline.expired():
+            break
+        subset = [random.randrange(n)]
+        common = masks[subset[0]]
+
+        while len(subset) < target_size and common:
+            if operations_count > budget:
+                break
+            candidate = random_set_bit(common)
+            common &= masks[candidate]
+            subset.append(candidate)
+            operations_count += 1
+
+        solutions_tested += 1
+        if largest is None or len(subset) > len(largest):
+            largest = subset
+        if not report_largest and len(subset) == clique_size:
+            return (
+                [graph.node_list[i] for i in subset],
+                operations_count,
+                solutions_tested,
+            )
+
+    # Sem tentativas (prazo esgotado ou num_trials=0) não há clique, como no networkx
+    if report_largest and largest is not None:
+        return [graph.node_list[i] for i in largest], operations_count, solutions_tested
+    return None, operations_count, solutions_tested
+
+
 @benchmark
-def monte_carlo_clique(graph, clique_size, num_trials=1000):
+def monte_carlo_clique(
+    graph, clique_size, num_trials=1000, report_largest=False, deadline=None
+):
+    deadline = deadline or Deadline()
     node_list = list(graph.nodes)
 
     if is_small_graph(node_list, clique_size):
         return None, 0, 0
 
+    if isinstance(graph, BitsetGraph):
+        return bitset_monte_carlo(
+            graph, clique_size, num_trials, report_largest, deadline
+        )
+
     operations_count = 0
     solutions_tested = 0
+    budget = 150 * graph.size() ** 2 + 100000
+
+    # Com report_largest cada tentativa cresce até um clique maximal e devolve-se
+    # o maior clique visto (de qualquer tamanho) em vez de parar no primeiro de tamanho k
+    target_size = len(node_list) if report_largest else clique_size
+    largest = None
 
     for _ in range(num_trials):
-        if operations_count > 150 * graph.size() ** 2 + 100000:
+        if operations_count > budget or deadline.expired():
             break
         subset = []
         node = random.choice(node_list)
         subset.append(node)
-        neighbors = set(graph.neighbors(node))
+        neighbors = list(graph.neighbors(node))
 
-        while (
-            len(subset) < clique_size
-            or operations_count < 150 * graph.size() ** 2 + 100000
-        ):
-            if not neighbors:
+        # Cada vértice escolhido é vizinho de todos os anteriores: subset é sempre um clique
+        while len(subset) < target_size and neighbors:
+            if operations_count > budget:
                 break
-            candidate = random.choice(list(neighbors))
+            candidate = random.choice(neighbors)
             subset.append(candidate)
-            neighbors.intersection_update(graph.neighbors(candidate))
+            neighbors = [x for x in neighbors if graph.has_edge(candidate, x)]
             operations_count += 1
 
         solutions_tested += 1
-        if len(subset) == clique_size and is_clique(graph, subset):
+        if largest is None or len(subset) > len(largest):
+            largest = subset
+        if not report_largest and len(subset) == clique_size:
             return subset, operations_count, solutions_tested
 
+    if report_largest:
+        return largest, operations_count, solutions_tested
     return None, operations_count, solutions_tested
 
 
+def bitset_monte_carlo_with_heuristic(graph, clique_size, num_trials, deadline):
+    # monte_carlo_with_heuristic_clique sobre um BitsetGraph. Com os vértices por
+    # grau decrescente (degree_ranking), a metade de maior grau dos candidatos são
+    # os bits menos significativos da máscara: não há lista a ordenar nem a filtrar
+    with phase("sort"):
+        ranked_nodes, ranked_masks = graph.degree_ranking()
+    n = len(ranked_masks)
+    solutions_tested = set()
+    operations_count = 0
+    budget = 150 * graph.size() ** 2 + 100000
+
+    for _ in range(num_trials):
+        if deadline.expired():
+            break
+        subset = [random.randrange(n)]
+        common = ranked_masks[subset[0]]
+        operations_count += 1
+
+        while len(subset) < clique_size:
+            if not common or operations_count > budget:
+                break
+
+            size = common.bit_count()
+            operations_count += size
+            candidate = nth_set_bit(common, random.randrange(max(1, size // 2)))
+            common &= ranked_masks[candidate]
+            subset.append(candidate)
+            operations_count += 1
+
+        subset_id = tuple(sorted(subset))
+        operations_count += len(subset)
+        if subset_id in solutions_tested:
+            count("duplicates")
+            continue
+        solutions_tested.add(subset_id)
+        operations_count += 1
+
+        if len(subset) < clique_size:
+            continue
+        # Cada vértice é vizinho comum dos anteriores: o subconjunto já é um clique
+        operations_count += sum(1 for _ in itertools.combinations(subset, 2))
+        return (
+            [ranked_nodes[r] for r in subset],
+            operations_count,
+            len(solutions_tested),
+        )
+
+    return None, operations_count, len(solutions_tested)
+
+
 @benchmark
-def monte_carlo_with_heuristic_clique(graph, clique_size, num_trials=1000):
+def monte_carlo_with_heuristic_clique(
+    graph, clique_size, num_trials=1000, deadline=None
+):
+    deadline = deadline or Deadline()
     node_list = list(graph.nodes)
 
     if is_small_graph(node_list, clique_size):
         return None, 0, 0
 
+    if isinstance(graph, BitsetGraph):
+        return bitset_monte_carlo_with_heuristic(
+            graph, clique_size, num_trials, deadline
+        )
+
     solutions_tested = set()
     operations_count = 0
+    degrees = dict(graph.degree())
+    budget = 150 * graph.size() ** 2 + 100000
 
     for _ in range(num_trials):
+        if deadline.expired():
+            break
         subset = []
         node = random.choice(node_list)
         subset.append(node)
-        neighbors = set(graph.neighbors(node))
+        # Ordenados por grau uma única vez: filtrar a lista mantém a ordem
+        neighbors = sorted(graph.neighbors(node), key=degrees.__getitem__, reverse=True)
         operations_count += 1
 
         while len(subset) < clique_size:
-            if not neighbors or operations_count > 150 * graph.size() ** 2 + 100000:
+            if not neighbors or operations_count > budget:
                 break
 
-            neighbors = sorted(
-                neighbors, key=lambda x: len(list(graph.neighbors(x))), reverse=True
-            )
             operations_count += len(neighbors)
-            candidate = random.choice(neighbors[: max(1, len(neighbors) // 2)])
+            candidate = neighbors[random.randrange(max(1, len(neighbors) // 2))]
             subset.append(candidate)
-            neighbors = set(neighbors).intersection(set(graph.neighbors(candidate)))
+            neighbors = [x for x in neighbors if graph.has_edge(candidate, x)]
             operations_count += 1
 
         subset_id = tuple(sorted(subset))
         operations_count += len(subset)
         if subset_id in solutions_tested:
+            count("duplicates")
             continue
         solutions_tested.add(subset_id)
         operations_count += 1
 
-        if len(subset) == clique_size and is_clique(graph, subset):
+        if len(subset) < clique_size:
+            continue
+        if is_clique(graph, subset):
             operations_count += sum(1 for _ in itertools.combinations(subset, 2))
             return subset, operations_count, len(solutions_tested)
 
@@ -129,83 +457,328 @@ def monte_carlo_with_heuristic_clique(graph, clique_size, num_trials=1000):
 
 
 @benchmark
-def las_vegas_clique(graph, clique_size, num_trials=1000):
-    node_list = list(graph.nodes)
+def las_vegas_clique(graph, clique_size, num_trials=1000, deadline=None):
+    deadline = deadline or Deadline()
+    try:
+        with phase("conversion"):
+            bitset = as_bitset_graph(graph, deadline)
+    except TimeoutError:
+        return None, 0, 0
+    node_list = bitset.node_list
+    masks = bitset.masks
 
     if is_small_graph(node_list, clique_size):
         return None, 0, 0
 
     operations_count = 0
     solutions_tested = 0
+    budget = 150 * bitset.size() ** 2 + 100000
+    rng = np.random.default_rng(random.getrandbits(64))
 
     for _ in range(num_trials):
-        if operations_count > 150 * graph.size() ** 2 + 100000:
+        if operations_count > budget or deadline.expired():
             break
         subset = []
-        candidate_nodes = node_list[:]
-        random.shuffle(candidate_nodes)
-
-        for node in candidate_nodes:
-            if operations_count > 150 * graph.size() ** 2 + 100000:
-                break
-            if len(subset) < clique_size and all(
-                graph.has_edge(node, v) for v in subset
-            ):
-                subset.append(node)
+        # Vizinhos comuns a todos os vértices já escolhidos (-1: todos os vértices)
+        common = -1
+
+        permutation = rng.permutation(len(node_list)).tolist()
+        for i in permutation:
+            if common >> i & 1:
+                subset.append(i)
+                common &= masks[i]
                 operations_count += len(subset) - 1
+                if len(subset) == clique_size or operations_count > budget:
+                    break
+                # Já não há candidatos suficientes para chegar a k
+                if len(subset) + common.bit_count() < clique_size:
+                    break
 
         solutions_tested += 1
         if len(subset) == clique_size:
-            return subset, operations_count, solutions_tested
+            return [node_list[i] for i in subset], operations_count, solutions_tested
 
     return None, operations_count, solutions_tested
 
 
 @benchmark
-def randomized_heuristic_clique(graph, clique_size, num_trials=1000):
+def randomized_heuristic_clique(
+    graph, clique_size, num_trials=1000, adaptive=False, decay=0.5, deadline=None
+):
+    deadline = deadline or Deadline()
     node_list = list(graph.nodes)
 
     if is_small_graph(node_list, clique_size):
         return None, 0, 0
 
     tested_solutions = set()
-    operations_count = 0
 
-    def heuristic(node):
-        return len(list(graph.neighbors(node)))
+    # O ranking por grau não muda entre tentativas: é calculado uma única vez
+    with phase("sort"):
+        degrees = dict(graph.degree())
+        sorted_nodes = sorted(node_list, key=degrees.__getitem__, reverse=True)
+    operations_count = len(node_list)
+
+    candidate_pool = sorted_nodes[: len(sorted_nodes) // 2]
+    if len(candidate_pool) < clique_size:
+        return None, operations_count, 0
+
+    # Modo adaptativo: vértices de arestas em falta perdem peso a cada tentativa falhada
+    weights = [max(degrees[node], 1) for node in candidate_pool]
+    budget = 150 * graph.size() ** 2 + 100000
 
     def generate_candidate():
         nonlocal operations_count
-        sorted_nodes = sorted(node_list, key=heuristic, reverse=True)
-        operations_count += len(node_list)
-
-        candidate_pool = sorted_nodes[: len(sorted_nodes) // 2]
-        if len(candidate_pool) < clique_size:
-            return None
-        subset = random.sample(candidate_pool, clique_size)
+        if adaptive:
+            # Amostragem ponderada sem reposição (Efraimidis-Spirakis)
+            positions = heapq.nlargest(
+                clique_size,
+                range(len(candidate_pool)),
+                key=lambda i: math.log(1.0 - random.random()) / weights[i],
+            )
+            operations_count += len(candidate_pool)
+        else:
+            positions = random.sample(range(len(candidate_pool)), clique_size)
         operations_count += clique_size
-        return subset
+        return positions
 
     for _ in range(num_trials):
-        if operations_count > 150 * graph.size() ** 2 + 100000:
+        if operations_count > budget or deadline.expired():
             break
 
-        candidate = generate_candidate()
-        if candidate is None:
-            continue
-        candidate_id = tuple(sorted(candidate))
+        positions = generate_candidate()
+        candidate = [candidate_pool[i] for i in positions]
+        candidate_id = tuple(sorted(positions))
         operations_count += len(candidate)
         if candidate_id in tested_solutions:
+            count("duplicates")
             continue
         tested_solutions.add(candidate_id)
         operations_count += 1
 
-        if is_clique(graph, candidate):
-            operations_count += sum(1 for _ in itertools.combinations(candidate, 2))
-            return (
-                candidate,
-                operations_count,
-                len(tested_solutions),
-            )
+        if adaptive:
+            missing = first_missing_edge(graph, candidate)
+            if missing is not None:
+                for node in missing:
+                    i = positions[candidate.index(node)]
+                    weights[i] = max(weights[i] * decay, MIN_WEIGHT)
+                continue
+        else:
+            if not is_clique(graph, candidate):
+                continue
+
+        operations_count += clique_size * (clique_size - 1) // 2
+        return (
+            candidate,
+            operations_count,
+            len(tested_solutions),
+        )
 
     return None, operations_count, len(tested_solutions)
+
+
+def extend_to_maximal(bitset, subset):
+    # Acrescenta vizinhos comuns até o clique ser maximal
+    clique = list(subset)
+    common = bitset.common_neighbors(clique)
+    while common:
+        low = common & -common
+        i = low.bit_length() - 1
+        clique.append(bitset.node_list[i])
+        common &= bitset.masks[i]
+    return clique
+
+
+def solve_k_values(
+    graph, k_values, algorithm=branch_and_bound_clique_search, *args, **kwargs
+):
+    """Responde a vários k sobre o mesmo grafo, devolvendo (k, Result, derived_from).
+
+    Os k são resolvidos por ordem crescente. Um clique encontrado é estendido até
+    ser maximal e responde de imediato a todos os k que cobre; com um algoritmo
+    exato, a ausência de clique de tamanho k responde a todos os k maiores. Nessas
+    respostas derivadas derived_from é o k que as resolveu (None nas restantes) e o
+    Result tem tempo e operações a 0.
+    """
+    name = algorithm.__name__
+    try:
+        bitset = as_bitset_graph(graph, kwargs.get("deadline"))
+    except TimeoutError:
+        # O prazo acabou na conversão: nenhum k fica respondido
+        yield min(k_values), Result(name, None, 0, 0.0, 0, True), None
+        return
+    largest = None
+    largest_from = None
+    no_clique_from = None
+
+    for k in sorted(set(k_values)):
+        if largest is not None and len(largest) >= k:
+            yield k, Result(name, tuple(largest[:k]), 0, 0.0, 0), largest_from
+            continue
+        if no_clique_from is not None and k >= no_clique_from:
+            yield k, Result(name, None, 0, 0.0, 0), no_clique_from
+            continue
+
+        result = algorithm(bitset, k, *args, **kwargs)
+        yield k, result, None
+        # Com o prazo esgotado os k seguintes ficam sem resposta
+        if result.timed_out:
+            return
+        if result.result is not None:
+            largest = extend_to_maximal(bitset, result.result)
+            largest_from = k
+        elif name in EXACT_ALGORITHMS:
+            no_clique_from = k
+
+
+def maximum_clique(graph, num_trials=1000, on_progress=None, deadline=None):
+    """Clique máximo do grafo, como algoritmo anytime.
+
+    As heurísticas aleatórias (monte_carlo_clique e las_vegas_clique) dão o clique
+    inicial; segue-se um branch and bound com coloração (MCQ) que prova a
+    otimalidade. on_progress(clique, upper_bound) é chamado sempre que o melhor
+    clique ou o limite superior mudam. Quando o deadline expira, devolve o melhor
+    clique até esse momento com optimal=False.
+    """
+    deadline = deadline or Deadline()
+    start = perf_counter()
+    try:
+        bitset = as_bitset_graph(graph, deadline)
+        order, core = bitset.degeneracy(deadline)
+    except TimeoutError:
+        # Sem tempo para a preparação: nenhum clique e o limite trivial
+        return MaximumCliqueResult(
+            "maximum_clique",
+            (),
+            0,
+            perf_counter() - start,
+            0,
+            True,
+            len(graph),
+            False,
+        )
+    masks = bitset.masks
+    best = []
+    # Um clique não tem mais vértices do que o core máximo + 1 nem do que cores
+    upper_bound = max(core, default=-1) + 1
+    upper_bound = greedy_coloring_bound(masks, (1 << len(order)) - 1, upper_bound)
+    operations_count = 2 * len(order)
+    solutions_tested = 0
+
+    def update(clique=None, bound=None):
+        nonlocal best, upper_bound
+        changed = False
+        if clique is not None and len(clique) > len(best):
+            best = list(clique)
+            changed = True
+        if bound is not None and bound < upper_bound:
+            upper_bound = max(bound, len(best))
+            changed = True
+        if changed and on_progress is not None:
+            on_progress([bitset.node_list[i] for i in best], upper_bound)
+
+    def improve_with(outcome):
+        nonlocal operations_count, solutions_tested
+        operations_count += outcome.operations
+        solutions_tested += outcome.solutions_tested
+        if outcome.result is None:
+            return False
+        clique = extend_to_maximal(bitset, outcome.result)
+        update([bitset.index[node] for node in clique])
+        return True
+
+    def expand(clique, candidates):
+        nonlocal operations_count, solutions_tested
+        if deadline.expired():
+            return
+        solutions_tested += 1
+        if not candidates:
+            update(clique)
+            return
+
+        # Do último para o primeiro: a cor de cada vértice limita o clique que ainda se forma
+        vertices, colors = coloring_order(masks, candidates)
+        operations_count += len(vertices)
+        for j in range(len(vertices) - 1, -1, -1):
+            if len(clique) + colors[j] <= len(best):
+                return
+            v = vertices[j]
+            operations_count += 1
+            expand(clique + [v], candidates & masks[v])
+            if deadline.triggered:
+                return
+            candidates &= ~(1 << v)
+
+    optimal = False
+    try:
+        if on_progress is not None:
+            on_progress([], upper_bound)
+        # Clique guloso a partir do vértice de maior core: há sempre um resultado
+        if order:
+            clique = extend_to_maximal(bitset, [bitset.node_list[order[-1]]])
+            operations_count += len(clique)
+            update([bitset.index[node] for node in clique])
+
+        improve_with(
+            monte_carlo_clique(
+                bitset, 1, num_trials, report_largest=True, deadline=deadline
+            )
+        )
+        # Tenta ultrapassar o melhor clique até a heurística falhar
+        while len(best) < upper_bound:
+            outcome = las_vegas_clique(
+                bitset, len(best) + 1, num_trials, deadline=deadline
+            )
+            if not improve_with(outcome):
+                break
+
+        # Cada clique é procurado a partir do seu primeiro vértice na ordem de
+        # degenerescência; as raízes seguem por ordem decrescente do seu limite,
+        # de modo que o limite da raiz atual é o limite superior global
+        roots = []
+        later = (1 << len(order)) - 1
+        for v in order:
+            if deadline.expired():
+                break
+            later &= ~(1 << v)
+            candidates = masks[v] & later
+            size = candidates.bit_count()
+            operations_count += size
+            bound = greedy_coloring_bound(masks, candidates, size) + 1
+            roots.append((bound, v, candidates))
+        roots.sort(key=lambda root: root[0], reverse=True)
+
+        for bound, v, candidates in roots:
+            if bound <= len(best) or deadline.expired():
+                break
+            update(bound=bound)
+            operations_count += 1
+            expand([v], candidates)
+        if not deadline.triggered:
+            update(bound=len(best))
+            optimal = True
+    except TimeoutError:
+        pass
+
+    return MaximumCliqueResult(
+        "maximum_clique",
+        tuple(bitset.node_list[i] for i in sorted(best)),
+        operations_count,
+        perf_counter() - start,
+        solutions_tested,
+        not optimal,
+        upper_bound,
+        optimal,
+    )
+
+
+# Algoritmos pela ordem em que são executados (os exatos primeiro, servem de referência)
+ALGORITHMS = {
+    "exhaustive_clique_search": exhaustive_clique_search,
+    "branch_and_bound_clique_search": branch_and_bound_clique_search,
+    "random_sampling_clique": random_sampling_clique,
+    "monte_carlo_clique": monte_carlo_clique,
+    "monte_carlo_with_heuristic_clique": monte_carlo_with_heuristic_clique,
+    "las_vegas_clique": las_vegas_clique,
+    "randomized_heuristic_clique": randomized_heuristic_clique,
+}
@@ -0,0 +1,193 @@
+import argparse
+import csv
+import os
+import pickle
+import numpy as np
+from inspect_results import print_table
+from results_store import RESULTS_DB, ResultsStore
+
+REFERENCE_ALGORITHM = "exhaustive_clique_search"
+# Limites dos intervalos de tamanhos usados com --by size_bin
+SIZE_BINS = [0, 50, 100, 200, 300, 500, 1000]
+GROUP_FIELDS = ["k", "density", "size_bin"]
+COLUMNS = [
+    "k",
+    "density",
+    "size",
+    "operations_count",
+    "time",
+    "timed_out",
+    "derived_from",
+]
+
+
+def load_results(db=RESULTS_DB, pickle_dir="../results/pickle"):
+    """Todas as células da grelha como arrays: da base de dados e, para os algoritmos
+    que lá não estão, dos pickles."""
+    columns = [*COLUMNS, "valid_result"]
+    parts = []
+    stored = []
+    if os.path.exists(db):
+        with ResultsStore(db) as store:
+            stored = store.algorithms()
+            parts.append(store.query(columns=columns))
+
+    with ResultsStore(":memory:") as store:
+        for file in sorted(os.listdir(pickle_dir)):
+            name = file.replace(".pickle", "")
+            if not file.endswith(".pickle") or name.startswith("SWlargeG"):
+                continue
+            if name != "maximum_clique" and name not in stored:
+                store.add_results(name, pickle.load(open(f"{pickle_dir}/{file}", "rb")))
+        parts.append(store.query(columns=columns))
+
+    # Partes vazias trariam arrays float e mudariam o tipo das colunas inteiras
+    parts = [part for part in parts if len(part["algorithm"])] or parts[-1:]
+    return {
+        column: np.concatenate([part[column] for part in parts]) for column in parts[0]
+    }
+
+
+def size_bins(sizes):
+    # Índice do intervalo de SIZE_BINS de cada tamanho (o último inclui o limite)
+    return np.clip(
+        np.searchsorted(SIZE_BINS, sizes, side="right") - 1, 0, len(SIZE_BINS) - 2
+    )
+
+
+def size_bin_label(index):
+    return f"{SIZE_BINS[index]}-{SIZE_BINS[index + 1]}"
+
+
+def group_index(data, by):
+    fields = {"algorithm": data["algorithm"]}
+    for field in by:
+        fields[field] = size_bins(data["size"]) if field == "size_bin" else data[field]
+    keys = np.rec.fromarrays(list(fields.values()), names=list(fields))
+    groups, inverse = np.unique(keys, return_inverse=True)
+    return groups, inverse.ravel()
+
+
+def group_mean(inverse, groups, values, mask):
+    # Média de values por grupo, só com as linhas de mask (NaN nos grupos vazios)
+    count = np.bincount(inverse, weights=mask, minlength=groups)
+    total = np.bincount(inverse, weights=np.where(mask, values, 0), minlength=groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count, count
+
+
+def log_speedups(data, finished, reference=REFERENCE_ALGORITHM):
+    """log(tempo da referência / tempo do algoritmo) de cada célula que ambos terminaram."""
+    keys = (
+        data["k"].astype(np.int64) * 10000 + np.round(data["density"] * 1000)
+    ).astype(np.int64) * 100000 + data["size"].astype(np.int64)
+
+    is_reference = finished & (data["algorithm"] == reference)
+    order = np.argsort(keys[is_reference])
+    reference_keys = keys[is_reference][order]
+    reference_times = data["time"][is_reference][order]
+
+    # Sem células da referência não há speed-ups (NaN em todos os grupos)
+    if reference_keys.size == 0:
+        return np.full(len(keys), np.nan), np.zeros(len(keys), dtype=bool)
+
+    position = np.minimum(
+        np.searchsorted(reference_keys, keys), reference_keys.size - 1
+    )
+    matched = finished & (reference_keys[position] == keys)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratios = np.where(
+            matched, np.log(reference_times[position] / data["time"]), np.nan
+        )
+    return ratios, matched
+
+
+def scaling_exponents(inverse, groups, sizes, operations, mask):
+    """Declive de log(operações) em função de log(n) por grupo (mínimos quadrados)."""
+    x = np.log(np.where(mask, sizes, 1))
+    y = np.log(np.where(mask, operations, 1))
+    n = np.bincount(inverse, weights=mask, minlength=groups)
+    sx = np.bincount(inverse, weights=x * mask, minlength=groups)
+    sy = np.bincount(inverse, weights=y * mask, minlength=groups)
+    sxx = np.bincount(inverse, weights=x * x * mask, minlength=groups)
+    sxy = np.bincount(inverse, weights=x * y * mask, minlength=groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slopes = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+    return np.where(n >= 3, slopes, np.nan)
+
+
+def summary(data, by=("k", "density")):
+    """Tabela com precisão, timeouts, speed-up e expoente de escala por grupo."""
+    groups, inverse = group_index(data, by)
+    n = len(groups)
+
+    timed_out = data["timed_out"] == 1
+    # Células derivadas de outro k (ver run.run_all_k) não têm tempo nem operações
+    derived = ~np.isnan(data["derived_from"].astype(float))
+    finished = ~timed_out & ~derived & (data["time"] > 0)
+    timeout_rate, cells = group_mean(inverse, n, timed_out, np.ones(len(inverse)))
+    # A precisão também exclui as derivadas: o clique vem de extend_to_maximal
+    validated = ~np.isnan(data["valid_result"]) & ~derived
+    precision, _ = group_mean(inverse, n, data["valid_result"], validated)
+
+    ratios, matched = log_speedups(data, finished)
+    log_speedup, _ = group_mean(inverse, n, ratios, matched)
+
+    growing = finished & (data["operations_count"] > 0) & (data["size"] > 1)
+    exponents = scaling_exponents(
+        inverse, n, data["size"], data["operations_count"], growing
+    )
+
+    headers = [
+        "algorithm",
+        *by,
+        "cells",
+        "timeout rate (%)",
+        "precision (%)",
+        f"speed-up vs {REFERENCE_ALGORITHM}",
+        "operations exponent",
+    ]
+    size_bin = 1 + list(by).index("size_bin") if "size_bin" in by else None
+    rows = []
+    for i, group in enumerate(groups.tolist()):
+        if size_bin is not None:
+            group = list(group)
+            group[size_bin] = size_bin_label(group[size_bin])
+        rows.append(
+            [
+                *group,
+                int(cells[i]),
+                timeout_rate[i] * 100,
+                precision[i] * 100,
+                np.exp(log_speedup[i]),
+                exponents[i],
+            ]
+        )
+    # NaN (sem dados no grupo) aparece como "-"
+    rows = [
+        [None if isinstance(v, float) and np.isnan(v) else v for v in row]
+        for row in rows
+    ]
+    return headers, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precisão, timeouts, speed-up e escala de todos os algoritmos"
+    )
+    parser.add_argument("--db", default=RESULTS_DB)
+    parser.add_argument("--pickle-dir", default="../results/pickle")
+    parser.add_argument(
+        "--by", nargs="+", default=["k", "density"], choices=GROUP_FIELDS
+    )
+    parser.add_argument("--csv", help="grava a tabela neste ficheiro CSV")
+    args = parser.parse_args()
+
+    headers, rows = summary(load_results(args.db, args.pickle_dir), args.by)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            writer.writerows(rows)
+    else:
+        print_table(headers, rows)
@@ -0,0 +1,379 @@
+import random
+import weakref
+import numpy as np
+
+# As fases de preparação (construção, ordem de degenerescência) consultam o prazo a
+# cada SETUP_STRIDE vértices e interrompem-se com TimeoutError quando expira
+SETUP_STRIDE = 256
+# Tentativas de random_set_bit por rejeição antes de escolher pela posição
+REJECTION_TRIES = 4
+
+# Matriz de dense_adjacency de cada grafo: desaparece quando o grafo deixa de ser usado
+_adjacency_cache = weakref.WeakKeyDictionary()
+
+
+def check_deadline(deadline, i):
+    if deadline is not None and i % SETUP_STRIDE == 0 and deadline.expired():
+        raise TimeoutError
+
+
+class PackedMasks:
+    """Máscaras de um BitsetGraph lidas de uma matriz de bits, uma linha por vértice.
+
+    A matriz (linhas de np.packbits com bitorder="little", ver packed_rows) pode
+    estar em memória partilhada (ver shared_graph.py): cada máscara só é convertida
+    para int quando é pedida, e não fica guardada no processo.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.row_bytes = matrix.shape[1]
+        self.buffer = memoryview(np.ascontiguousarray(matrix)).cast("B")
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def __getitem__(self, i):
+        start = i * self.row_bytes
+        return int.from_bytes(self.buffer[start : start + self.row_bytes], "little")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class BitsetGraph:
+    """Grafo não dirigido em que a vizinhança de cada vértice é um inteiro (bitset).
+
+    Implementa o subconjunto da API do networkx usado em algorithms.py
+    (nodes, size, neighbors, has_edge, degree), pelo que todos os algoritmos
+    correm sobre ele sem alterações. Só ganham com ele os que trabalham sobre
+    as máscaras (is_clique, branch and bound, las_vegas e os monte_carlo); os
+    restantes fazem um has_edge de cada vez, tal como no networkx.
+    """
+
+    def __init__(self, graph, deadline=None):
+        self.node_list = list(graph.nodes)
+        self.index = {node: i for i, node in enumerate(self.node_list)}
+        self.masks = [0] * len(self.node_list)
+
+        number_of_edges = 0
+        for i, node in enumerate(self.node_list):
+            check_deadline(deadline, i)
+            mask = 0
+            for neighbor in graph.neighbors(node):
+                j = self.index[neighbor]
+                if j != i:
+                    mask |= 1 << j
+            self.masks[i] = mask
+            number_of_edges += mask.bit_count()
+        self.number_of_edges = number_of_edges // 2
+        self.degeneracy_cache = None
+        self.ranking_cache = None
+
+    @classmethod
+    def from_masks(cls, node_list, masks):
+        graph = cls.__new__(cls)
+        graph.node_list = list(node_list)
+        graph.index = {node: i for i, node in enumerate(graph.node_list)}
+        graph.masks = list(masks)
+        graph.number_of_edges = sum(mask.bit_count() for mask in graph.masks) // 2
+        graph.degeneracy_cache = None
+        graph.ranking_cache = None
+        return graph
+
+    @classmethod
+    def from_packed(cls, node_list, matrix, number_of_edges):
+        # Sobre uma matriz de packed_rows, sem copiar as linhas (ver PackedMasks)
+        graph = cls.__new__(cls)
+        graph.node_list = list(node_list)
+        graph.index = {node: i for i, node in enumerate(graph.node_list)}
+        graph.masks = PackedMasks(matrix)
+        graph.number_of_edges = number_of_edges
+        graph.degeneracy_cache = None
+        graph.ranking_cache = None
+        return graph
+
+    @property
+    def nodes(self):
+        return self.node_list
+
+    def __len__(self):
+        return len(self.node_list)
+
+    def __iter__(self):
+        return iter(self.node_list)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def number_of_nodes(self):
+        return len(self.node_list)
+
+    def size(self):
+        # Tal como no networkx, size() devolve o número de arestas
+        return self.number_of_edges
+
+    def mask(self, node):
+        return self.masks[self.index[node]]
+
+    def has_edge(self, u, v):
+        return bool(self.masks[self.index[u]] >> self.index[v] & 1)
+
+    def neighbors(self, node):
+        return self.nodes_from_mask(self.masks[self.index[node]])
+
+    def degree(self, node=None):
+        if node is None:
+            return [
+                (n, mask.bit_count()) for n, mask in zip(self.node_list, self.masks)
+            ]
+        return self.masks[self.index[node]].bit_count()
+
+    def degeneracy(self, deadline=None):
+        # Calculada uma vez por grafo e partilhada entre chamadas (por exemplo vários k)
+        if self.degeneracy_cache is None:
+            self.degeneracy_cache = degeneracy_ordering(self.masks, deadline)
+        return self.degeneracy_cache
+
+    def degree_ranking(self):
+        """Vértices por grau decrescente e as vizinhanças indexadas por essa ordem.
+
+        Com os bits por ordem de grau, os candidatos de maior grau de uma máscara
+        são os seus bits menos significativos (ver nth_set_bit). Calculado uma vez
+        por grafo, como degeneracy.
+        """
+        if self.ranking_cache is None:
+            n = len(self.node_list)
+            order = sorted(range(n), key=lambda i: -self.masks[i].bit_count())
+            row_bytes = (n + 7) // 8
+            ranked_masks = []
+            # Em blocos de linhas: a matriz de bits nunca é construída inteira
+            for start in range(0, n, SETUP_STRIDE):
+                rows = order[start : start + SETUP_STRIDE]
+                packed = np.frombuffer(
+                    b"".join(self.masks[i].to_bytes(row_bytes, "little") for i in rows),
+                    dtype=np.uint8,
+                ).reshape(len(rows), row_bytes)
+                bits = np.unpackbits(packed, axis=1, count=n, bitorder="little")
+                ranked = np.packbits(bits[:, order], axis=1, bitorder="little")
+                ranked_masks.extend(
+                    int.from_bytes(row.tobytes(), "little") for row in ranked
+                )
+            self.ranking_cache = [self.node_list[i] for i in order], ranked_masks
+        return self.ranking_cache
+
+    def subset_mask(self, subset):
+        mask = 0
+        for node in subset:
+            mask |= 1 << self.index[node]
+        return mask
+
+    def nodes_from_mask(self, mask):
+        while mask:
+            low = mask & -mask
+            yield self.node_list[low.bit_length() - 1]
+            mask ^= low
+
+    def is_clique(self, subset):
+        # Cada vértice tem de pertencer à vizinhança comum dos anteriores
+        common = -1
+        for node in subset:
+            i = self.index[node]
+            if not common >> i & 1:
+                return False
+            common &= self.masks[i]
+        return True
+
+    def common_neighbors(self, subset):
+        mask = (1 << len(self.node_list)) - 1
+        for node in subset:
+            mask &= self.masks[self.index[node]]
+        return mask
+
+    def subgraph(self, nodes):
+        node_list = [node for node in nodes if node in self.index]
+        new_index = {self.index[node]: j for j, node in enumerate(node_list)}
+        selected = self.subset_mask(node_list)
+
+        masks = []
+        for old_i in new_index:
+            mask = 0
+            remaining = self.masks[old_i] & selected
+            while remaining:
+                low = remaining & -remaining
+                mask |= 1 << new_index[low.bit_length() - 1]
+                remaining ^= low
+            masks.append(mask)
+        return BitsetGraph.from_masks(node_list, masks)
+
+
+def as_bitset_graph(graph, deadline=None):
+    if isinstance(graph, BitsetGraph):
+        return graph
+    # Grafos imutáveis (CSRGraph) guardam a conversão e reutilizam-na entre chamadas;
+    # com a matriz de bits partilhada (adjacency_bits) a conversão não copia nada
+    if hasattr(graph, "bitset_cache"):
+        if graph.bitset_cache is None and graph.adjacency_bits is not None:
+            graph.bitset_cache = BitsetGraph.from_packed(
+                graph.nodes, graph.adjacency_bits, graph.size()
+            )
+        elif graph.bitset_cache is None:
+            graph.bitset_cache = BitsetGraph(graph, deadline)
+        return graph.bitset_cache
+    return BitsetGraph(graph, deadline)
+
+
+def packed_rows(offsets, neighbor_indices):
+    """Matriz de bits (n x ceil(n / 8) bytes) das vizinhanças de um grafo em CSR."""
+    n = len(offsets) - 1
+    rows = np.repeat(np.arange(n), np.diff(offsets))
+    columns = np.asarray(neighbor_indices, dtype=np.int64)
+    keep = rows != columns
+    bits = np.zeros((n, (n + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(
+        bits,
+        (rows[keep], columns[keep] >> 3),
+        (1 << (columns[keep] & 7)).astype(np.uint8),
+    )
+    return bits
+
+
+def dense_adjacency(graph, deadline=None):
+    """Matriz de adjacência booleana pela ordem de graph.nodes, com a diagonal a True.
+
+    Calculada uma vez por grafo (os grafos não são alterados depois de criados);
+    utils.prepare_graph constrói-a antes do tempo medido.
+    """
+    if graph in _adjacency_cache:
+        return _adjacency_cache[graph]
+
+    # Um vértice "vê-se" a si próprio
+    node_list = list(graph.nodes)
+    n = len(node_list)
+    if isinstance(graph, BitsetGraph) and isinstance(graph.masks, PackedMasks):
+        adjacency = np.unpackbits(
+            graph.masks.matrix, axis=1, count=n, bitorder="little"
+        ).astype(bool)
+    elif isinstance(graph, BitsetGraph):
+        row_bytes = (n + 7) // 8
+        packed = np.frombuffer(
+            b"".join(mask.to_bytes(row_bytes, "little") for mask in graph.masks),
+            dtype=np.uint8,
+        ).reshape(n, row_bytes)
+        adjacency = np.unpackbits(packed, axis=1, count=n, bitorder="little")
+        adjacency = adjacency.astype(bool)
+    else:
+        index = {node: i for i, node in enumerate(node_list)}
+        rows = []
+        columns = []
+        for i, node in enumerate(node_list):
+            check_deadline(deadline, i)
+            neighbors = [index[v] for v in graph.neighbors(node)]
+            rows.extend([i] * len(neighbors))
+            columns.extend(neighbors)
+        adjacency = np.zeros((n, n), dtype=bool)
+        adjacency[rows, columns] = True
+    np.fill_diagonal(adjacency, True)
+    _adjacency_cache[graph] = adjacency
+    return adjacency
+
+
+def nth_set_bit(mask, j):
+    """Índice do j-ésimo bit a 1 de mask, a contar do menos significativo (j >= 0)."""
+    # Pesquisa binária pelo menor prefixo de mask com j + 1 bits a 1
+    low, high = 0, mask.bit_length()
+    while low < high:
+        middle = (low + high) // 2
+        if (mask & ((1 << (middle + 1)) - 1)).bit_count() > j:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+
+def random_set_bit(mask):
+    """Índice de um bit a 1 de mask (não nula), escolhido uniformemente."""
+    # Por rejeição enquanto a máscara é densa; senão, pela posição
+    width = mask.bit_length()
+    for _ in range(REJECTION_TRIES):
+        i = random.randrange(width)
+        if mask >> i & 1:
+            return i
+    return nth_set_bit(mask, random.randrange(mask.bit_count()))
+
+
+def degeneracy_ordering(masks, deadline=None):
+    """Ordem de remoção "smallest-last" e número de core de cada vértice.
+
+    Com deadline, lança TimeoutError se o prazo expirar a meio (ver check_deadline).
+    """
+    n = len(masks)
+    degrees = [mask.bit_count() for mask in masks]
+    buckets = [set() for _ in range(max(degrees, default=0) + 1)]
+    for i, degree in enumerate(degrees):
+        buckets[degree].add(i)
+
+    order = []
+    core = [0] * n
+    removed = 0
+    current = 0
+    for step in range(n):
+        check_deadline(deadline, step)
+        current = max(current - 1, 0)
+        while not buckets[current]:
+            current += 1
+        i = buckets[current].pop()
+        order.append(i)
+        core[i] = current
+        removed |= 1 << i
+
+        remaining = masks[i] & ~removed
+        while remaining:
+            low = remaining & -remaining
+            j = low.bit_length() - 1
+            buckets[degrees[j]].remove(j)
+            degrees[j] -= 1
+            buckets[degrees[j]].add(j)
+            remaining ^= low
+
+    # O número de core é o máximo dos graus de remoção até ao momento
+    for position in range(1, n):
+        core[order[position]] = max(core[order[position]], core[order[position - 1]])
+    return order, core
+
+
+def greedy_coloring_bound(masks, candidates, limit):
+    """Número de cores de uma coloração gulosa de candidates (parando em limit)."""
+    colors = 0
+    uncolored = candidates
+    while uncolored and colors < limit:
+        colors += 1
+        available = uncolored
+        while available:
+            low = available & -available
+            uncolored ^= low
+            available &= ~masks[low.bit_length() - 1] & ~low
+    return colors
+
+
+def coloring_order(masks, candidates):
+    """Vértices de candidates por classe de cor gulosa, com a cor de cada um (MCQ).
+
+    Os vértices saem por ordem crescente de cor: a cor de um vértice limita o
+    tamanho de qualquer clique formado por ele e pelos vértices anteriores.
+    """
+    order = []
+    colors = []
+    color = 0
+    uncolored = candidates
+    while uncolored:
+        color += 1
+        available = uncolored
+        while available:
+            low = available & -available
+            i = low.bit_length() - 1
+            order.append(i)
+            colors.append(color)
+            uncolored ^= low
+            available &= ~masks[i] & ~low
+    return order, colors
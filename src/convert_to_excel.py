@@ -1,6 +1,30 @@
+import argparse
+import csv
 import os
 import json
 from openpyxl import Workbook
+from results_store import RESULTS_DB, ResultsStore
+
+HEADERS = [
+    "k",
+    "Edge Density",
+    "Size",
+    "Result",
+    "Operations Count",
+    "Time (s)",
+    "Solution Tested",
+    "Timed Out",
+]
+STORE_COLUMNS = [
+    "k",
+    "density",
+    "size",
+    "result",
+    "operations_count",
+    "time",
+    "solution_tested",
+    "timed_out",
+]
 
 
 def sanitize_sheet_name(name):
@@ -11,71 +35,120 @@ def sanitize_sheet_name(name):
     return name[:31]  # Limita a 31 caracteres, máximo permitido no Excel
 
 
-def convert_normal_to_excel(input_dir, files, output_file):
-    # Cria o workbook Excel
-    wb = Workbook()
+def format_row(k, edge_density, size, result, operations, time, tested, timed_out):
+    # Células com timeout têm só as contagens parciais
+    return [
+        k,
+        edge_density,
+        size,
+        ", ".join(map(str, result)) if result and not timed_out else None,
+        operations,
+        time,
+        tested,
+        "Sim" if timed_out else "Não",
+    ]
+
+
+def rows_from_store(store, name, k_values=None):
+    # O cursor lê as linhas da base de dados à medida que são escritas
+    for k, density, size, result, *counts, timed_out in store.select(
+        STORE_COLUMNS, algorithm=name, k=k_values
+    ):
+        result = json.loads(result) if result else None
+        yield format_row(k, density, size, result, *counts, timed_out)
+
+
+def rows_from_json(path, k_values=None):
+    with open(path, "r") as f:
+        results = json.load(f)
+
+    for k, densities in results.items():
+        if k_values and int(k) not in k_values:
+            continue
+        for edge_density, sizes in densities.items():
+            for size, data in sizes.items():
+                yield format_row(
+                    k,
+                    edge_density,
+                    size,
+                    data.get("result"),
+                    data.get("operations_count"),
+                    data.get("time"),
+                    data.get("solution_tested"),
+                    "timed_out" in data,
+                )
+
 
-    # Processa cada ficheiro JSON
-    for file_index, file in enumerate(files):
-        print(f"Processing {file}...")
+def sources(input_dir, db, algorithms=None, k_values=None):
+    """(nome, linhas) de cada algoritmo: da base de dados ou, se lá não estiver, dos JSON."""
+    stored = set()
+    if os.path.exists(db):
+        store = ResultsStore(db)
+        stored = store.algorithms()
+        for name in stored:
+            if not algorithms or name in algorithms:
+                yield name, rows_from_store(store, name, k_values)
+        store.close()
 
-        # Lê o conteúdo do ficheiro JSON
-        with open(os.path.join(input_dir, file), "r") as f:
-            results = json.load(f)
+    for file in sorted(os.listdir(input_dir)):
+        name = file.replace(".json", "")
+        if not file.endswith(".json") or name.startswith("SWlargeG"):
+            continue
+        if name == "maximum_clique" or name in stored:
+            continue
+        if algorithms and name not in algorithms:
+            continue
+        yield name, rows_from_json(os.path.join(input_dir, file), k_values)
 
-        # Define o nome da folha, sanitizando se necessário
-        sheet_name = sanitize_sheet_name(
-            file.replace(".json", "").replace("_clique_search", "")
+
+def convert_normal_to_excel(
+    input_dir, output_file, algorithms=None, k_values=None, db=RESULTS_DB
+):
+    # Modo write-only: cada linha é escrita no ficheiro e não fica em memória
+    wb = Workbook(write_only=True)
+
+    for name, rows in sources(input_dir, db, algorithms, k_values):
+        print(f"Processing {name}...")
+        ws = wb.create_sheet(
+            title=sanitize_sheet_name(name.replace("_clique_search", ""))
         )
-        ws = wb.create_sheet(title=sheet_name) if file_index > 0 else wb.active
-        ws.title = sheet_name
-
-        # Cabeçalhos
-        headers = [
-            "k",
-            "Edge Density",
-            "Size",
-            "Result",
-            "Operations Count",
-            "Time (s)",
-            "Solution Tested",
-            "Timed Out",
-        ]
-        ws.append(headers)
-
-        # Processa os resultados e escreve na planilha
-        for k, densities in results.items():
-            for edge_density, sizes in densities.items():
-                for size, data in sizes.items():
-                    row = [k, edge_density, size]
-                    if "timed_out" in data:
-                        row += [None, None, None, None, "Sim"]
-                    else:
-                        row += [
-                            (
-                                ", ".join(map(str, data.get("result", [])))
-                                if data.get("result")
-                                else None
-                            ),
-                            data.get("operations_count", None),
-                            data.get("time", None),
-                            data.get("solution_tested", None),
-                            "Não",
-                        ]
-                    ws.append(row)
+        ws.append(HEADERS)
+        for row in rows:
+            ws.append(row)
 
     print(f"Saving all results to {output_file}...")
-    # Salva o workbook
     wb.save(output_file)
     print("Excel file created successfully!")
 
 
-if __name__ == "__main__":
-    # Diretórios de entrada e saída
-    input_dir = "../results/json"
-    output_file = "../results/results.xlsx"
+def convert_to_csv(
+    input_dir, output_file, algorithms=None, k_values=None, db=RESULTS_DB
+):
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Algorithm", *HEADERS])
+        for name, rows in sources(input_dir, db, algorithms, k_values):
+            print(f"Processing {name}...")
+            writer.writerows([name, *row] for row in rows)
+    print(f"CSV file {output_file} created successfully!")
 
-    # Lista de ficheiros JSON no diretório de entrada
-    files = [f for f in os.listdir(input_dir) if f.endswith(".json")]
 
-    convert_normal_to_excel(input_dir, files, output_file)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exporta os resultados para Excel (ou CSV), em streaming"
+    )
+    parser.add_argument("--input-dir", default="../results/json")
+    parser.add_argument("--db", default=RESULTS_DB)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx")
+    parser.add_argument("--algorithms", nargs="+")
+    parser.add_argument("--k", type=int, nargs="+")
+    args = parser.parse_args()
+
+    output_file = args.output or f"../results/results.{args.format}"
+    if args.format == "csv":
+        convert_to_csv(args.input_dir, output_file, args.algorithms, args.k, args.db)
+    else:
+        convert_normal_to_excel(
+            args.input_dir, output_file, args.algorithms, args.k, args.db
+        )
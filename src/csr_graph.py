@@ -0,0 +1,172 @@
+import os
+import pickle
+from functools import lru_cache
+import numpy as np
+
+# Vizinhanças (sets) de has_edge guardadas por processo; acima deste número de
+# vértices consultados descartam-se as menos usadas, para a memória não crescer
+# até à adjacência inteira num grafo grande
+NEIGHBOR_SETS_CACHE = 65536
+
+
+class CSRGraph:
+    """Grafo não dirigido em formato CSR: offsets + vizinhos (ordenados) de cada vértice.
+
+    Os arrays podem vir de np.load(..., mmap_mode="r"), caso em que vários
+    processos partilham a mesma imagem do ficheiro sem cópias. Implementa o
+    subconjunto da API do networkx usado em algorithms.py; has_edge usa sets
+    Python construídos à medida, apenas para os vértices consultados, numa
+    cache limitada a NEIGHBOR_SETS_CACHE vértices.
+    """
+
+    def __init__(
+        self, offsets, neighbor_indices, labels=None, degrees=None, adjacency_bits=None
+    ):
+        self.offsets = offsets
+        self.neighbor_indices = neighbor_indices
+        self.degrees = np.diff(offsets) if degrees is None else degrees
+        # labels[i] é o nome original do vértice i (None se forem 0..n-1)
+        self.labels = labels
+        self.index = None
+        # Matriz de bits das vizinhanças (ver bitset_graph.packed_rows), publicada em
+        # memória partilhada por shared_graph.py; None quando não há
+        self.adjacency_bits = adjacency_bits
+        # Conversão para bitset (ver bitset_graph.as_bitset_graph), feita uma só vez;
+        # com adjacency_bits as máscaras são lidas da matriz partilhada
+        self.bitset_cache = None
+        self.node_list = None
+        # Vizinhos (pelo nome) dos vértices consultados recentemente em has_edge
+        self.neighbor_set = lru_cache(maxsize=NEIGHBOR_SETS_CACHE)(self.row_set)
+        if labels is not None:
+            self.index = {label: i for i, label in enumerate(labels.tolist())}
+
+    @property
+    def nodes(self):
+        if self.labels is None:
+            return range(self.number_of_nodes())
+        if self.node_list is None:
+            self.node_list = self.labels.tolist()
+        return self.node_list
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __contains__(self, node):
+        if self.index is not None:
+            return node in self.index
+        return 0 <= node < self.number_of_nodes()
+
+    def number_of_nodes(self):
+        return len(self.offsets) - 1
+
+    def size(self):
+        return len(self.neighbor_indices) // 2
+
+    def position(self, node):
+        return node if self.index is None else self.index[node]
+
+    def row(self, node):
+        i = self.position(node)
+        return self.neighbor_indices[self.offsets[i] : self.offsets[i + 1]]
+
+    def neighbors(self, node):
+        row = self.row(node)
+        if self.labels is None:
+            return iter(row.tolist())
+        return iter(self.labels[row].tolist())
+
+    def row_set(self, node):
+        # Construído na primeira consulta a node (ver neighbor_set): as seguintes são
+        # uma pesquisa num set, sem chamadas ao numpy (que custam mais do que o teste)
+        return set(self.neighbors(node))
+
+    def has_edge(self, u, v):
+        if self.adjacency_bits is not None:
+            j = self.position(v)
+            return bool(
+                self.adjacency_bits.item(self.position(u), j >> 3) >> (j & 7) & 1
+            )
+        return v in self.neighbor_set(u)
+
+    def subgraph(self, nodes):
+        """CSRGraph induzido por nodes (com os nomes originais como labels)."""
+        n = self.number_of_nodes()
+        keep = np.zeros(n, dtype=bool)
+        keep[[self.position(node) for node in nodes]] = True
+        new_index = np.cumsum(keep) - 1
+
+        rows = np.repeat(np.arange(n), self.degrees)
+        kept_edges = keep[rows] & keep[self.neighbor_indices]
+        neighbor_indices = new_index[self.neighbor_indices[kept_edges]].astype(
+            self.neighbor_indices.dtype
+        )
+        offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(
+            np.bincount(new_index[rows[kept_edges]], minlength=len(offsets) - 1)
+        )
+        labels = np.flatnonzero(keep) if self.labels is None else self.labels[keep]
+        return CSRGraph(offsets, neighbor_indices, labels)
+
+    def degree(self, node=None):
+        if node is None:
+            return list(zip(self.nodes, self.degrees.tolist()))
+        return int(self.degrees[self.position(node)])
+
+
+def write_csr(directory, offsets, neighbor_indices, labels=None):
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "offsets.npy"), offsets)
+    np.save(os.path.join(directory, "neighbors.npy"), neighbor_indices)
+    labels_path = os.path.join(directory, "labels.npy")
+    if labels is not None:
+        np.save(labels_path, labels)
+    elif os.path.exists(labels_path):
+        os.remove(labels_path)
+
+
+def csr_arrays(graph):
+    """(offsets, vizinhos, labels) de um grafo networkx (ou de um CSRGraph)."""
+    if isinstance(graph, CSRGraph):
+        return graph.offsets, graph.neighbor_indices, graph.labels
+
+    node_list = list(graph.nodes)
+    index = {node: i for i, node in enumerate(node_list)}
+
+    rows = []
+    for node in node_list:
+        row = sorted(index[v] for v in graph.neighbors(node) if v != node)
+        rows.append(row)
+
+    offsets = np.zeros(len(node_list) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    dtype = np.int32 if len(node_list) < 2**31 else np.int64
+    neighbor_indices = np.fromiter(
+        (j for row in rows for j in row), dtype=dtype, count=int(offsets[-1])
+    )
+
+    labels = None
+    if node_list != list(range(len(node_list))):
+        labels = np.array(node_list)
+    return offsets, neighbor_indices, labels
+
+
+def save_csr(graph, directory):
+    write_csr(directory, *csr_arrays(graph))
+
+
+def load_csr(directory, mmap=True):
+    mode = "r" if mmap else None
+    offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode=mode)
+    neighbor_indices = np.load(os.path.join(directory, "neighbors.npy"), mmap_mode=mode)
+    labels_path = os.path.join(directory, "labels.npy")
+    labels = np.load(labels_path) if os.path.exists(labels_path) else None
+    return CSRGraph(offsets, neighbor_indices, labels)
+
+
+if __name__ == "__main__":
+    # Converte o grafo grande já existente em pickle para o formato CSR
+    graph = pickle.load(open("../graphs/SWlargeG.pickle", "rb"))
+    save_csr(graph, "../graphs/SWlargeG_csr")
@@ -1,17 +1,85 @@
-import networkx as nx
-import pickle
-
-lines = []
-with open("../graphs/SWlargeG.txt", "r") as f:
-    f.readline()
-    f.readline()
-    f.readline()
-    f.readline()
-    lines = f.readlines()
-
-G = nx.Graph()
-for line in lines:
-    line = line.split()
-    G.add_edge(int(line[0]), int(line[1]))
-
-pickle.dump(G, open("../graphs/SWlargeG.pickle", "wb"))
+import argparse
+import itertools
+import numpy as np
+from csr_graph import write_csr
+
+# Linhas de cabeçalho do SWlargeG.txt antes da lista de arestas
+HEADER_LINES = 4
+CHUNK_LINES = 1_000_000
+
+
+def read_edge_chunks(path, header_lines=HEADER_LINES, chunk_lines=CHUNK_LINES):
+    # Lê a lista de arestas em blocos de linhas, cada bloco convertido de uma vez pelo numpy
+    with open(path, "r") as f:
+        for _ in range(header_lines):
+            f.readline()
+
+        while True:
+            chunk = list(itertools.islice(f, chunk_lines))
+            if not chunk:
+                break
+            lines = [line for line in chunk if line.strip() and line[0] not in "#%"]
+            if not lines:
+                continue
+
+            # Só as duas primeiras colunas de cada linha: colunas extra (por exemplo
+            # pesos) são ignoradas, mesmo que só existam em algumas linhas
+            yield np.loadtxt(lines, dtype=np.int64, usecols=(0, 1), ndmin=2)
+
+
+def convert_edge_list(
+    path, output_dir, header_lines=HEADER_LINES, chunk_lines=CHUNK_LINES
+):
+    chunks = []
+    for edges in read_edge_chunks(path, header_lines, chunk_lines):
+        # Remove lacetes e orienta cada aresta como (menor, maior)
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        edges = np.sort(edges, axis=1)
+        chunks.append(np.unique(edges, axis=0))
+
+    edges = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    del chunks
+
+    # Os nomes dos vértices passam a índices 0..n-1
+    labels = np.unique(edges)
+    n = len(labels)
+    low = np.searchsorted(labels, edges[:, 0])
+    high = np.searchsorted(labels, edges[:, 1])
+    del edges
+
+    # Arestas repetidas entre blocos diferentes
+    keys = np.unique(low * n + high)
+    low, high = np.divmod(keys, n)
+    del keys
+
+    # Cada aresta aparece nos dois sentidos, ordenada por (origem, destino)
+    sources = np.concatenate([low, high])
+    targets = np.concatenate([high, low])
+    del low, high
+    order = np.lexsort((targets, sources))
+    dtype = np.int32 if n < 2**31 else np.int64
+    neighbor_indices = targets[order].astype(dtype)
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+
+    if np.array_equal(labels, np.arange(n)):
+        labels = None
+    write_csr(output_dir, offsets, neighbor_indices, labels)
+    return n, len(neighbor_indices) // 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Converte uma lista de arestas para o formato CSR (ver csr_graph.py)"
+    )
+    parser.add_argument("input", nargs="?", default="../graphs/SWlargeG.txt")
+    parser.add_argument("output", nargs="?", default="../graphs/SWlargeG_csr")
+    parser.add_argument("--header-lines", type=int, default=HEADER_LINES)
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES)
+    args = parser.parse_args()
+
+    nodes, edges = convert_edge_list(
+        args.input, args.output, args.header_lines, args.chunk_lines
+    )
+    print(f"Converted graph with {nodes} nodes and {edges} edges to {args.output}")
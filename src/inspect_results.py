@@ -0,0 +1,172 @@
+import argparse
+import pickle
+import numpy as np
+from results_store import RESULTS_DB, ResultsStore
+
+# Colunas mostradas por omissão na listagem de células
+LIST_COLUMNS = [
+    "algorithm",
+    "k",
+    "density",
+    "size",
+    "found",
+    "operations_count",
+    "time",
+    "solution_tested",
+    "timed_out",
+    "valid_result",
+]
+PAGE_SIZE = 50
+
+
+def format_value(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def print_table(headers, rows):
+    rows = [[format_value(value) for value in row] for row in rows]
+    widths = [
+        max([len(header)] + [len(row[i]) for row in rows])
+        for i, header in enumerate(headers)
+    ]
+    print("  ".join(header.ljust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def list_cells(store, filters, page, page_size):
+    # Só a página pedida é lida da base de dados (LIMIT / OFFSET sobre o índice)
+    total = store.count(**filters)
+    pages = max((total + page_size - 1) // page_size, 1)
+    rows = store.select(
+        LIST_COLUMNS, limit=page_size, offset=(page - 1) * page_size, **filters
+    ).fetchall()
+    print_table(LIST_COLUMNS, rows)
+    print(f"Page {page} of {pages} ({total} cells)")
+
+
+def summarize(data):
+    """Agregados por (algoritmo, k, densidade) a partir das colunas de ResultsStore.query."""
+    keys = np.rec.fromarrays([data["algorithm"], data["k"], data["density"]])
+    groups, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+
+    cells = np.bincount(inverse, minlength=len(groups))
+    timeouts = np.bincount(inverse, weights=data["timed_out"], minlength=len(groups))
+    # Células derivadas de outro k (ver run.run_all_k): sem tempo nem clique próprios
+    derived = ~np.isnan(data["derived_from"].astype(float))
+    # Precisão: fração de valid_result verdadeiros entre as células com referência
+    validated = ~np.isnan(data["valid_result"]) & ~derived
+    checked = np.bincount(inverse, weights=validated, minlength=len(groups))
+    correct = np.bincount(
+        inverse,
+        weights=np.where(validated, data["valid_result"], 0),
+        minlength=len(groups),
+    )
+
+    # Mediana do tempo das células terminadas: ordena por grupo e depois por tempo
+    finished = (data["timed_out"] == 0) & ~derived & ~np.isnan(data["time"])
+    order = np.lexsort((data["time"][finished], inverse[finished]))
+    times = data["time"][finished][order]
+    starts = np.searchsorted(inverse[finished][order], np.arange(len(groups) + 1))
+
+    rows = []
+    for i, (algorithm, k, density) in enumerate(groups.tolist()):
+        group_times = times[starts[i] : starts[i + 1]]
+        rows.append(
+            [
+                algorithm,
+                k,
+                density,
+                int(cells[i]),
+                int(timeouts[i]),
+                correct[i] / checked[i] * 100 if checked[i] else None,
+                float(np.median(group_times)) if len(group_times) else None,
+            ]
+        )
+    return rows
+
+
+def show_pickle(path, filters):
+    # Ficheiros antigos, fora da base de dados: mostra só as células pedidas
+    with open(path, "rb") as f:
+        results = pickle.load(f)
+
+    size_range = filters["size_range"] or (0, float("inf"))
+    for k, densities in results.items():
+        if filters["k"] and k not in filters["k"]:
+            continue
+        if not isinstance(densities, dict) or not all(
+            isinstance(cells, dict) for cells in densities.values()
+        ):
+            print(k, densities)
+            continue
+        for density, cells in densities.items():
+            if filters["density"] and density not in filters["density"]:
+                continue
+            for size, cell in cells.items():
+                if size_range[0] <= size <= size_range[1]:
+                    print(k, density, size, cell)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Consulta os resultados guardados (ver results_store.py)"
+    )
+    parser.add_argument("--db", default=RESULTS_DB)
+    parser.add_argument("--pickle", help="mostra um ficheiro pickle em vez da base")
+    parser.add_argument("--algo", nargs="+")
+    parser.add_argument("--k", type=int, nargs="+")
+    parser.add_argument("--density", type=float, nargs="+")
+    parser.add_argument("--size-range", type=int, nargs=2, metavar=("MIN", "MAX"))
+    parser.add_argument("--graph", default="grid")
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="timeouts, precisão e mediana do tempo por algoritmo, k e densidade",
+    )
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    args = parser.parse_args()
+
+    filters = {
+        "algorithm": args.algo,
+        "k": args.k,
+        "density": args.density,
+        "size_range": args.size_range,
+    }
+    if args.pickle:
+        show_pickle(args.pickle, filters)
+    else:
+        with ResultsStore(args.db) as store:
+            filters["graph"] = args.graph
+            if args.summary:
+                data = store.query(
+                    columns=[
+                        "k",
+                        "density",
+                        "time",
+                        "timed_out",
+                        "valid_result",
+                        "derived_from",
+                    ],
+                    **filters,
+                )
+                print_table(
+                    [
+                        "algorithm",
+                        "k",
+                        "density",
+                        "cells",
+                        "timeouts",
+                        "precision (%)",
+                        "median time (s)",
+                    ],
+                    summarize(data),
+                )
+            else:
+                list_cells(store, filters, args.page, args.page_size)
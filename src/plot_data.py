@@ -1,123 +1,119 @@
+import argparse
+import hashlib
+import json
 import os
-from matplotlib import pyplot as plt
-from utils import import_data, EDGES_DENSITY
-
-
-def plot_number_operations_vs_number_of_vertices(
-    results, name, k, log=False, save=False, show=False
-):
-    for max_edges in EDGES_DENSITY:
-        x = []
-        y = []
-        for size in range(k, 300):
-            try:
-                y.append(results[k][max_edges][size]["operations_count"])
-            except KeyError:
-                break
-            x.append(size)
-
-        for size in range(300, 1001, 5):
-            try:
-                y.append(results[k][max_edges][size]["operations_count"])
-            except KeyError:
-                break
-            x.append(size)
-
-        if log:
-            plt.semilogy(x, y, label=f"edges ratio: {max_edges}")
-        else:
-            plt.plot(x, y, label=f"edges ratio: {max_edges}")
-
-        plt.xlabel("Number of vertices")
-        plt.ylabel("Number of operations")
-        plt.title(f"Number of Operations vs Number of Vertices for k={k}")
-        plt.legend()
-        plt.grid(True)
-
-    if save:
-        plt.savefig(
-            f"../charts/{name}/k{k}_number_operations_vs_number_of_vertices.png"
-        )
-    if show:
-        plt.show()
-
-    plt.close()
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import matplotlib
 
-
-def plot_time_vs_number_of_vertices(
-    results, name, k, log=False, save=False, show=False
-):
+matplotlib.use("Agg")
+from matplotlib import pyplot as plt
+from utils import import_data, EDGES_DENSITY, EXACT_ALGORITHMS, SWEEP_SIZES
+
+CHARTS_DIR = "../charts"
+# Hash dos dados de cada gráfico já gerado, para só regenerar os que mudaram
+CACHE_PATH = os.path.join(CHARTS_DIR, "charts_cache.json")
+# Incrementar quando o aspeto dos gráficos muda, para os regenerar todos
+CHART_VERSION = 1
+K_VALUES = [5, 10, 15]
+
+# Campo da célula -> (eixo y, título, ficheiro)
+METRICS = {
+    "solution_tested": (
+        "Number of solutions tested",
+        "Number of Solutions Tested vs Number of Vertices for k={k}",
+        "k{k}_number_of_solutions_tested_vs_graph_size.png",
+    ),
+    "time": (
+        "Time (s)",
+        "Time Taken vs Number of Vertices for k={k}",
+        "k{k}_time_vs_number_of_vertices.png",
+    ),
+    "operations_count": (
+        "Number of operations",
+        "Number of Operations vs Number of Vertices for k={k}",
+        "k{k}_number_operations_vs_number_of_vertices.png",
+    ),
+}
+SERIES_FIELDS = ["size", *METRICS, "time_q1", "time_q3"]
+
+
+def extract_series(results, k):
+    """Séries de cada densidade para k, numa só passagem: {densidade: {campo: array}}.
+
+    Cada série vai do tamanho k até à primeira célula com timeout; os tamanhos em
+    falta (por exemplo numa grelha adaptativa, ver adaptive_sweep.py) e as células
+    derivadas de outro k (derived_from, ver run.run_all_k) são ignorados.
+    """
+    series = {}
     for max_edges in EDGES_DENSITY:
-        x = []
-        y = []
-        for size in range(k, 300):
-            try:
-                y.append(results[k][max_edges][size]["time"])
-            except KeyError:
-                break
-            x.append(size)
-
-        for size in range(300, 1001, 5):
-            try:
-                y.append(results[k][max_edges][size]["time"])
-            except KeyError:
+        cells = results.get(k, {}).get(max_edges, {})
+        columns = {field: [] for field in SERIES_FIELDS}
+        for size in SWEEP_SIZES:
+            if size < k:
+                continue
+            cell = cells.get(size)
+            if cell is None or "derived_from" in cell:
+                continue
+            if cell.get("timed_out"):
                 break
-            x.append(size)
-
-        if log:
+            columns["size"].append(size)
+            for field in METRICS:
+                columns[field].append(cell[field])
+            # Quartis das repetições (ver utils.repeat_benchmark), se existirem
+            columns["time_q1"].append(cell.get("time_q1", cell["time"]))
+            columns["time_q3"].append(cell.get("time_q3", cell["time"]))
+        series[max_edges] = {
+            field: np.array(values, dtype=float) for field, values in columns.items()
+        }
+    return series
+
+
+def chart_hash(chart):
+    digest = hashlib.sha256(
+        f"{CHART_VERSION}:{chart['metric']}:{chart['k']}:{chart['log']}".encode()
+    )
+    for max_edges, columns in chart["series"].items():
+        digest.update(str(max_edges).encode())
+        for field in SERIES_FIELDS:
+            digest.update(columns[field].tobytes())
+    return digest.hexdigest()
+
+
+def render_chart(chart):
+    metric, k = chart["metric"], chart["k"]
+    ylabel, title, _ = METRICS[metric]
+
+    for max_edges, columns in chart["series"].items():
+        x = columns["size"]
+        y = columns[metric]
+        lower = y - columns["time_q1"]
+        upper = columns["time_q3"] - y
+
+        if metric == "time" and (lower.any() or upper.any()):
+            plt.errorbar(
+                x,
+                y,
+                yerr=[lower, upper],
+                capsize=2,
+                label=f"edges ratio: {max_edges} (median, IQR)",
+            )
+            if chart["log"]:
+                plt.yscale("log")
+        elif chart["log"]:
             plt.semilogy(x, y, label=f"edges ratio: {max_edges}")
         else:
             plt.plot(x, y, label=f"edges ratio: {max_edges}")
-        plt.xlabel("Number of vertices")
-        plt.ylabel("Time (s)")
-        plt.title(f"Time Taken vs Number of Vertices for k={k}")
-        plt.legend()
-        plt.grid(True)
-
-    if save:
-        plt.savefig(f"../charts/{name}/k{k}_time_vs_number_of_vertices.png")
-    if show:
-        plt.show()
-    plt.close()
-
 
-def plot_number_of_solutions_tested_vs_graph_size(
-    results, name, k, log=False, save=False, show=False
-):
-    for max_edges in EDGES_DENSITY:
-        x = []
-        y = []
-        for size in range(k, 300):
-            try:
-                y.append(results[k][max_edges][size]["solution_tested"])
-            except KeyError:
-                break
-            x.append(size)
-
-        for size in range(300, 1001, 5):
-            try:
-                y.append(results[k][max_edges][size]["solution_tested"])
-            except KeyError:
-                break
-            x.append(size)
-
-        if log:
-            plt.semilogy(x, y, label=f"edges ratio: {max_edges}")
-        else:
-            plt.plot(x, y, label=f"edges ratio: {max_edges}")
         plt.xlabel("Number of vertices")
-        plt.ylabel("Number of solutions tested")
-        plt.title(f"Number of Solutions Tested vs Number of Vertices for k={k}")
+        plt.ylabel(ylabel)
+        plt.title(title.format(k=k))
         plt.legend()
         plt.grid(True)
 
-    if save:
-        plt.savefig(
-            f"../charts/{name}/k{k}_number_of_solutions_tested_vs_graph_size.png"
-        )
-    if show:
-        plt.show()
+    plt.savefig(chart["path"])
     plt.close()
+    return chart["path"]
 
 
 def precision_greedy_results(results, name):
@@ -127,6 +123,10 @@ def precision_greedy_results(results, name):
     for k in results:
         for max_edges in results[k]:
             for size in results[k][max_edges]:
+                # Células derivadas de outro k (ver run.run_all_k): o clique não
+                # vem da heurística, mas de extend_to_maximal
+                if "derived_from" in results[k][max_edges][size]:
+                    continue
                 try:
                     result = results[k][max_edges][size]["valid_result"]
                     if result == True or result == False:
@@ -139,50 +139,70 @@ def precision_greedy_results(results, name):
     return valid_results / total * 100
 
 
-def main():
-    k_values = [5, 10, 15]
-    # Open all the files that start with results_adaptive_randomized_vertex_cover
+def load_cache():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    with open(CACHE_PATH, "r") as f:
+        return json.load(f)
+
+
+def main(k_values=K_VALUES, workers=None, force=False):
     files = [
         f
         for f in os.listdir("../results/pickle")
         if f.endswith(".pickle") and not f.startswith("SWlargeG")
     ]
+    cache = {} if force else load_cache()
+
+    # Extrai todas as séries uma única vez e decide que gráficos têm de ser gerados
+    charts = []
+    unchanged = 0
+    for file in files:
+        name = file.replace(".pickle", "")
+        if name == "maximum_clique":
+            continue
+        results = import_data(f"../results/pickle/{file}")
+
+        if name not in EXACT_ALGORITHMS:
+            precision = precision_greedy_results(results, name)
+            print(f"Precision for {name}: {precision}%")
+
+        os.makedirs(os.path.join(CHARTS_DIR, name), exist_ok=True)
+        for k in k_values:
+            series = extract_series(results, k)
+            for metric, (_, _, filename) in METRICS.items():
+                chart = {
+                    "path": os.path.join(CHARTS_DIR, name, filename.format(k=k)),
+                    "metric": metric,
+                    "k": k,
+                    "log": True,
+                    "series": series,
+                }
+                chart["hash"] = chart_hash(chart)
+                if cache.get(chart["path"]) == chart["hash"] and os.path.exists(
+                    chart["path"]
+                ):
+                    unchanged += 1
+                    continue
+                charts.append(chart)
 
-    # Load all the files
-    results = [import_data(f"../results/pickle/{file}") for file in files]
-
-    # Plot all the files as different lines where each one is a different algorithm
-    for result, file in zip(results, files):
-        if "exhaustive_clique_search" not in file:
-            precision = precision_greedy_results(result, file.replace(".pickle", ""))
-            print(f"Precision for {file.replace(".pickle", "")}: {precision}%")
+    if charts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chart, _ in zip(charts, executor.map(render_chart, charts)):
+                cache[chart["path"]] = chart["hash"]
 
-        for k in k_values:
-            plot_number_of_solutions_tested_vs_graph_size(
-                result,
-                file.replace(".pickle", ""),
-                k,
-                log=True,
-                save=True,
-                show=False,
-            )
-            plot_time_vs_number_of_vertices(
-                result,
-                file.replace(".pickle", ""),
-                k,
-                log=True,
-                save=True,
-                show=False,
-            )
-            plot_number_operations_vs_number_of_vertices(
-                result,
-                file.replace(".pickle", ""),
-                k,
-                log=True,
-                save=True,
-                show=False,
-            )
+        with open(CACHE_PATH, "w") as f:
+            json.dump(cache, f, indent=4, sort_keys=True)
+    print(f"{len(charts)} charts generated, {unchanged} unchanged")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Gera os gráficos dos resultados, só para os dados que mudaram"
+    )
+    parser.add_argument("--k", type=int, nargs="+", default=K_VALUES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    main(args.k, args.workers, args.force)
@@ -0,0 +1,103 @@
+import weakref
+from collections import namedtuple
+import networkx as nx
+from bitset_graph import BitsetGraph
+from csr_graph import CSRGraph
+
+CoreReduction = namedtuple("CoreReduction", ["graph", "pruned_nodes", "pruned_edges"])
+
+# Cache por grafo: desaparece quando o grafo deixa de ser usado. Os valores nunca
+# referem o próprio grafo (senão a chave nunca seria libertada)
+_core_numbers_cache = weakref.WeakKeyDictionary()
+_reductions_cache = weakref.WeakKeyDictionary()
+
+
+def csr_core_numbers(graph):
+    """Core number de cada vértice de um CSRGraph (Batagelj-Zaversnik, O(m))."""
+    offsets = graph.offsets.tolist()
+    neighbors = graph.neighbor_indices.tolist()
+    n = len(offsets) - 1
+    degree = [
+        sum(1 for u in neighbors[offsets[v] : offsets[v + 1]] if u != v)
+        for v in range(n)
+    ]
+
+    # Vértices ordenados por grau, com o início de cada grau em bins
+    bins = [0] * (max(degree, default=0) + 1)
+    for d in degree:
+        bins[d] += 1
+    start = 0
+    for d, number in enumerate(bins):
+        bins[d] = start
+        start += number
+    position = [0] * n
+    vertices = [0] * n
+    for v, d in enumerate(degree):
+        position[v] = bins[d]
+        vertices[bins[d]] = v
+        bins[d] += 1
+    for d in range(len(bins) - 1, 0, -1):
+        bins[d] = bins[d - 1]
+    bins[0] = 0
+
+    for v in vertices:
+        for u in neighbors[offsets[v] : offsets[v + 1]]:
+            if u != v and degree[u] > degree[v]:
+                # u desce um grau: troca com o primeiro vértice do seu grau
+                du = degree[u]
+                w = vertices[bins[du]]
+                if u != w:
+                    pu, pw = position[u], bins[du]
+                    position[u], position[w] = pw, pu
+                    vertices[pu], vertices[pw] = w, u
+                bins[du] += 1
+                degree[u] -= 1
+    return dict(zip(graph.nodes, degree))
+
+
+def core_numbers(graph):
+    if graph in _core_numbers_cache:
+        return _core_numbers_cache[graph]
+
+    if isinstance(graph, BitsetGraph):
+        _, core = graph.degeneracy()
+        cores = dict(zip(graph.node_list, core))
+    elif isinstance(graph, CSRGraph):
+        cores = csr_core_numbers(graph)
+    else:
+        if nx.number_of_selfloops(graph):
+            graph_without_loops = graph.copy()
+            graph_without_loops.remove_edges_from(nx.selfloop_edges(graph))
+            cores = nx.core_number(graph_without_loops)
+        else:
+            cores = nx.core_number(graph)
+
+    _core_numbers_cache[graph] = cores
+    return cores
+
+
+def k_core_reduction(graph, clique_size):
+    """Restringe o grafo ao (k-1)-core, o único sítio onde pode existir um k-clique."""
+    reductions = _reductions_cache.setdefault(graph, {})
+    if clique_size in reductions:
+        # None: nada a remover (o grafo não é guardado no seu próprio valor da cache)
+        return reductions[clique_size] or CoreReduction(graph, 0, 0)
+
+    cores = core_numbers(graph)
+    kept_nodes = [node for node in graph.nodes if cores[node] >= clique_size - 1]
+
+    if len(kept_nodes) == len(cores):
+        reductions[clique_size] = None
+        return CoreReduction(graph, 0, 0)
+    if isinstance(graph, (BitsetGraph, CSRGraph)):
+        reduced = graph.subgraph(kept_nodes)
+    else:
+        reduced = graph.subgraph(kept_nodes).copy()
+
+    reduction = CoreReduction(
+        reduced,
+        len(cores) - len(kept_nodes),
+        graph.size() - reduced.size(),
+    )
+    reductions[clique_size] = reduction
+    return reduction
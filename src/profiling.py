@@ -0,0 +1,144 @@
+import argparse
+import cProfile
+import glob
+import json
+import os
+import pstats
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+
+class NoOpPhase:
+    # Devolvido por phase() quando o profiling está desligado: não mede nada
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_OP_PHASE = NoOpPhase()
+
+
+class PhaseTimer:
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.times[self.name] += perf_counter_ns() - self.start
+        self.profile.calls[self.name] += 1
+        return False
+
+
+class PhaseProfile:
+    """Tempo (ns) e número de entradas por fase, e contadores livres, de uma execução."""
+
+    def __init__(self):
+        self.times = Counter()
+        self.calls = Counter()
+        self.counts = Counter()
+
+    def as_dict(self):
+        return {
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+            "counts": dict(self.counts),
+        }
+
+
+# Perfil a receber as medições (None: profiling desligado)
+active_profile = None
+
+
+def phase(name):
+    """Context manager que mede a fase name do algoritmo em execução."""
+    if active_profile is None:
+        return NO_OP_PHASE
+    return PhaseTimer(active_profile, name)
+
+
+def count(name, amount=1):
+    if active_profile is not None:
+        active_profile.counts[name] += amount
+
+
+@contextmanager
+def collect_phases():
+    global active_profile
+    previous = active_profile
+    active_profile = PhaseProfile()
+    try:
+        yield active_profile
+    finally:
+        active_profile = previous
+
+
+def cell_profile_path(directory, name, k, max_edges, size):
+    return os.path.join(directory, name, f"k{k}_d{max_edges}_n{size}")
+
+
+def profile_call(path, func, *args, **kwargs):
+    """Corre func com cProfile e com as fases ligadas; grava path.prof e path.json."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler = cProfile.Profile()
+    with collect_phases() as phases:
+        outcome = profiler.runcall(func, *args, **kwargs)
+    profiler.dump_stats(f"{path}.prof")
+    with open(f"{path}.json", "w") as f:
+        json.dump(phases.as_dict(), f, indent=4)
+    return outcome
+
+
+def aggregate(directory, name="*", pattern="*"):
+    """Soma os perfis das células de directory/name/pattern (cProfile e fases)."""
+    stats = None
+    for path in sorted(glob.glob(os.path.join(directory, name, f"{pattern}.prof"))):
+        if stats is None:
+            stats = pstats.Stats(path)
+        else:
+            stats.add(path)
+
+    phases = PhaseProfile()
+    for path in sorted(glob.glob(os.path.join(directory, name, f"{pattern}.json"))):
+        with open(path, "r") as f:
+            cell = json.load(f)
+        phases.times.update(cell["times"])
+        phases.calls.update(cell["calls"])
+        phases.counts.update(cell["counts"])
+    return stats, phases
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Agrega os perfis por célula gravados por run.py / sweep.py"
+    )
+    parser.add_argument("directory", nargs="?", default="../results/profiles")
+    parser.add_argument("--algorithm", default="*")
+    parser.add_argument("--cells", default="*", help="por exemplo 'k5_d0.5_*'")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--sort", default="cumulative")
+    args = parser.parse_args()
+
+    stats, phases = aggregate(args.directory, args.algorithm, args.cells)
+    if stats is None:
+        print(f"No profiles found in {args.directory}")
+    else:
+        stats.sort_stats(args.sort).print_stats(args.top)
+
+    total = sum(phases.times.values())
+    for name, elapsed in phases.times.most_common():
+        print(
+            f"{name:<20} {elapsed / 1e9:>10.4f} s {elapsed / total * 100:>6.1f}% {phases.calls[name]:>12} calls"
+        )
+    for name, amount in phases.counts.most_common():
+        print(f"{name:<20} {amount:>12}")
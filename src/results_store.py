@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import numpy as np
+
+# Base de dados com uma linha por execução (algoritmo, grafo, k, densidade, tamanho)
+RESULTS_DB = "../results/results.sqlite"
+GRID_GRAPH = "grid"
+
+# Colunas numéricas, pela ordem da tabela; result é guardado em JSON
+COLUMNS = [
+    "k",
+    "density",
+    "size",
+    "found",
+    "operations_count",
+    "time",
+    "solution_tested",
+    "timed_out",
+    "valid_result",
+    "pruned_nodes",
+    "pruned_edges",
+    "repeats",
+    "time_median",
+    "time_q1",
+    "time_q3",
+    "time_min",
+    "peak_memory",
+    "derived_from",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    algorithm TEXT NOT NULL,
+    graph TEXT NOT NULL,
+    k INTEGER NOT NULL,
+    density REAL,
+    size INTEGER,
+    found INTEGER,
+    operations_count INTEGER,
+    time REAL,
+    solution_tested INTEGER,
+    timed_out INTEGER NOT NULL,
+    valid_result INTEGER,
+    pruned_nodes INTEGER,
+    pruned_edges INTEGER,
+    repeats INTEGER,
+    time_median REAL,
+    time_q1 REAL,
+    time_q3 REAL,
+    time_min REAL,
+    peak_memory INTEGER,
+    derived_from INTEGER,
+    result TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS runs_key
+    ON runs (algorithm, graph, k, IFNULL(density, -1), IFNULL(size, -1));
+CREATE INDEX IF NOT EXISTS runs_by_cell ON runs (k, density, size);
+"""
+
+# Colunas sempre devolvidas em float (NULL passa a NaN), mesmo sem valores em falta
+FLOAT_COLUMNS = {"density", "valid_result", "time"}
+
+
+def cell_row(algorithm, graph, k, density, size, cell):
+    # valid_result: 1/0, ou NULL quando não havia referência ("No valid result to compare")
+    valid_result = cell.get("valid_result")
+    if not isinstance(valid_result, bool):
+        valid_result = None
+    result = cell.get("result")
+    return {
+        "algorithm": algorithm,
+        "graph": graph,
+        "k": k,
+        "density": density,
+        "size": size,
+        "found": None if "result" not in cell else int(result is not None),
+        "operations_count": cell.get("operations_count"),
+        "time": cell.get("time"),
+        "solution_tested": cell.get("solution_tested"),
+        "timed_out": int(bool(cell.get("timed_out"))),
+        "valid_result": valid_result,
+        "pruned_nodes": cell.get("pruned_nodes"),
+        "pruned_edges": cell.get("pruned_edges"),
+        "repeats": cell.get("repeats"),
+        "time_median": cell.get("time_median"),
+        "time_q1": cell.get("time_q1"),
+        "time_q3": cell.get("time_q3"),
+        "time_min": cell.get("time_min"),
+        "peak_memory": cell.get("peak_memory"),
+        "derived_from": cell.get("derived_from"),
+        "result": None if result is None else json.dumps(list(result)),
+    }
+
+
+class ResultsStore:
+    """Resultados de todas as execuções numa tabela SQLite, consultados por colunas."""
+
+    def __init__(self, path=RESULTS_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.migrate()
+
+    def migrate(self):
+        # Bases de dados criadas antes de uma coluna existir: acrescenta-a (a NULL)
+        existing = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(runs)")
+        }
+        with self.connection:
+            for column in COLUMNS:
+                if column not in existing:
+                    kind = "REAL" if column in FLOAT_COLUMNS else "INTEGER"
+                    self.connection.execute(
+                        f"ALTER TABLE runs ADD COLUMN {column} {kind}"
+                    )
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def add_rows(self, rows, replace=None):
+        """Insere rows; replace=(algoritmo, grafo) apaga antes todas as linhas desse par.
+
+        Assim os resultados de uma execução substituem por inteiro os da anterior,
+        mesmo que esta tenha chegado a tamanhos maiores.
+        """
+        rows = list(rows)
+        with self.connection:
+            if replace is not None:
+                self.connection.execute(
+                    "DELETE FROM runs WHERE algorithm = ? AND graph = ?", replace
+                )
+            if not rows:
+                return
+            fields = list(rows[0])
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO runs ({', '.join(fields)}) "
+                f"VALUES ({', '.join(':' + field for field in fields)})",
+                rows,
+            )
+
+    def add_results(self, algorithm, results, graph=GRID_GRAPH):
+        """Substitui as células de algorithm em graph por results[k][densidade][tamanho]."""
+        self.add_rows(
+            (
+                cell_row(algorithm, graph, k, density, size, cell)
+                for k, densities in results.items()
+                for density, sizes in densities.items()
+                for size, cell in sizes.items()
+            ),
+            replace=(algorithm, graph),
+        )
+
+    def add_large_graph_results(self, algorithm, results, graph="SWlargeG"):
+        # Resultados por k de um único grafo (run.SWlargeG): sem densidade nem tamanho
+        self.add_rows(
+            (
+                cell_row(algorithm, graph, k, None, None, cell)
+                for k, cell in results.items()
+            ),
+            replace=(algorithm, graph),
+        )
+
+    def algorithms(self, graph=GRID_GRAPH):
+        rows = self.connection.execute(
+            "SELECT DISTINCT algorithm FROM runs WHERE graph = ? ORDER BY algorithm",
+            (graph,),
+        )
+        return [algorithm for (algorithm,) in rows]
+
+    def select(
+        self,
+        columns,
+        algorithm=None,
+        k=None,
+        density=None,
+        size_range=None,
+        graph=GRID_GRAPH,
+        limit=None,
+        offset=0,
+    ):
+        """Cursor sobre as linhas filtradas, lidas à medida que se itera.
+
+        algorithm, k e density aceitam um valor ou uma lista; size_range é (mínimo, máximo),
+        inclusivo. As linhas vêm ordenadas por algoritmo, k, densidade e tamanho;
+        limit e offset escolhem uma página dessa ordem.
+        """
+        where, parameters = self.where(algorithm, k, density, size_range, graph)
+        page = ""
+        if limit is not None:
+            page = " LIMIT ? OFFSET ?"
+            parameters += [limit, offset]
+        return self.connection.execute(
+            f"SELECT {', '.join(columns)} FROM runs WHERE {where} "
+            f"ORDER BY algorithm, k, density DESC, size{page}",
+            parameters,
+        )
+
+    def count(
+        self, algorithm=None, k=None, density=None, size_range=None, graph=GRID_GRAPH
+    ):
+        where, parameters = self.where(algorithm, k, density, size_range, graph)
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM runs WHERE {where}", parameters
+        ).fetchone()[0]
+
+    def where(self, algorithm, k, density, size_range, graph):
+        conditions = ["graph = ?"]
+        parameters = [graph]
+        for column, value in (("algorithm", algorithm), ("k", k), ("density", density)):
+            if value is None:
+                continue
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            parameters.extend(values)
+        if size_range is not None:
+            conditions.append("size BETWEEN ? AND ?")
+            parameters.extend(size_range)
+        return " AND ".join(conditions), parameters
+
+    def query(
+        self,
+        algorithm=None,
+        k=None,
+        density=None,
+        size_range=None,
+        columns=COLUMNS,
+        graph=GRID_GRAPH,
+    ):
+        """Colunas pedidas como arrays numpy (filtros como em select).
+
+        A coluna algorithm vem sempre incluída.
+        """
+        columns = [column for column in columns if column != "algorithm"]
+        rows = self.select(
+            ["algorithm", *columns], algorithm, k, density, size_range, graph
+        ).fetchall()
+
+        data = {"algorithm": np.array([row[0] for row in rows], dtype=object)}
+        for i, column in enumerate(columns, start=1):
+            values = [row[i] for row in rows]
+            if column == "result":
+                data[column] = np.array(
+                    [None if v is None else json.loads(v) for v in values],
+                    dtype=object,
+                )
+            elif column in FLOAT_COLUMNS or None in values:
+                data[column] = np.array(
+                    [np.nan if v is None else v for v in values], dtype=float
+                )
+            else:
+                data[column] = np.array(values)
+        return data
+
+
+def import_pickles(directory="../results/pickle", path=RESULTS_DB):
+    # Migra os resultados já gravados em pickle para a base de dados
+    with ResultsStore(path) as store:
+        for file in sorted(os.listdir(directory)):
+            if not file.endswith(".pickle"):
+                continue
+            results = pickle.load(open(os.path.join(directory, file), "rb"))
+            name = file.replace(".pickle", "")
+            if name.startswith("SWlargeG_"):
+                store.add_large_graph_results(name[len("SWlargeG_") :], results)
+            elif name != "maximum_clique":
+                store.add_results(name, results)
+            print(f"Imported {file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Importa os pickles de resultados para a base de dados SQLite"
+    )
+    parser.add_argument("directory", nargs="?", default="../results/pickle")
+    parser.add_argument("--db", default=RESULTS_DB)
+    args = parser.parse_args()
+
+    import_pickles(args.directory, args.db)
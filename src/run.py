@@ -1,233 +1,381 @@
-import signal
+import argparse
 from collections import defaultdict
-from algorithms import (
-    exhaustive_clique_search,
-    random_sampling_clique,
-    monte_carlo_clique,
-    monte_carlo_with_heuristic_clique,
-    las_vegas_clique,
-    randomized_heuristic_clique,
+from functools import lru_cache
+from algorithms import ALGORITHMS, maximum_clique, solve_k_values
+from utils import (
+    ALGORITHM_OPTIONS,
+    EDGES_DENSITY,
+    EXACT_ALGORITHMS,
+    K_VALUES,
+    SWEEP_SIZES,
+    TIME_LIMIT,
+    Deadline,
+    log,
+    append_checkpoint,
+    benchmark_fields,
+    checkpoint_path,
+    clear_checkpoint,
+    convert_to_json,
+    get_graph,
+    load_checkpoint,
+    load_reference_results,
+    measure_cell,
+    number_of_trials,
+    prepare_graph,
+    setup_timeout,
+    time_limit,
+    timed_out_cell,
+    validate_result,
 )
-from utils import EDGES_DENSITY, SIZES, log, convert_to_json
+from csr_graph import load_csr
+from profiling import cell_profile_path
+from results_store import ResultsStore
 import pickle
 import json
 import os
 
-# Carregar os grafos previamente gerados
-graphs = pickle.load(open("../graphs/all_graphs.pickle", "rb"))
-
 # Lista de valores de clique de tamanho k que estamos procurando
-k_values = [5, 6, 7, 8, 9, 10, 15]  # Exemplo, ajuste conforme necessário
-TIME_LIMIT = 100
-
-
-# Timeout handler function
-def timeout_handler(signum, frame):
-    raise TimeoutError("Algoritmo ultrapassou o limite de tempo")
+k_values = K_VALUES
+# "networkx" ou "bitset" (vizinhanças como inteiros, ver bitset_graph.py)
+GRAPH_BACKEND = "networkx"
+# Corre os algoritmos apenas sobre o (k-1)-core do grafo
+K_CORE_PREFILTER = False
+# Diretório para o cProfile e as fases de cada célula (None: sem profiling), por
+# exemplo "../results/profiles"; os ficheiros agregam-se com profiling.py
+PROFILE_DIR = None
 
 
 # Função para rodar o algoritmo e armazenar os resultados
 def run(algorithm, name):
-    if name != "exhaustive_clique_search":
-        results_exhaustive = pickle.load(
-            open(f"../results/pickle/exhaustive_clique_search.pickle", "rb")
-        )
+    if name not in EXACT_ALGORITHMS:
+        results_exhaustive = load_reference_results()
+
+    # Células já concluídas numa execução anterior interrompida
+    checkpoint = checkpoint_path(name, GRAPH_BACKEND, K_CORE_PREFILTER)
+    done = load_checkpoint(checkpoint)
+    if done:
+        log.info(f"Resuming {name} algorithm, {len(done)} cells already done")
 
     results = defaultdict(dict)
     for k in k_values:
         for max_edges in EDGES_DENSITY:
-            for size in range(1, SIZES + 1):
-                if size > 300 and size % 5 != 0:
+            for size in SWEEP_SIZES:
+                if (k, max_edges, size) in done:
+                    cell = done[(k, max_edges, size)]
+                    results[k].setdefault(max_edges, {})[size] = cell
+                    if cell.get("timed_out"):
+                        break
                     continue
 
                 log.info(
                     f"Running {name} algorithm for graph with size {size}, clique size {k}, and density of edges {max_edges}"
                 )
+                # O algoritmo consulta o prazo e devolve o trabalho feito se o esgotar;
+                # a preparação do grafo tem o mesmo prazo
+                seconds = time_limit(name, size)
+                profile_path = None
+                if PROFILE_DIR:
+                    profile_path = cell_profile_path(
+                        PROFILE_DIR, name, k, max_edges, size
+                    )
                 try:
-                    # Start the timer
-                    signal.signal(signal.SIGALRM, timeout_handler)
-                    if name == "exhaustive_clique_search":
-                        signal.alarm(TIME_LIMIT)
-                    else:
-                        signal.alarm(int(1 / 1700 * size**2 + 0.8))
-
-                    if name == "exhaustive_clique_search":
-                        (
-                            algorithm_name,
-                            result,
-                            operations_count,
-                            time,
-                            solution_tested,
-                        ) = algorithm(graphs[max_edges][size], k)
-                    else:
-                        (
-                            algorithm_name,
-                            result,
-                            operations_count,
-                            time,
-                            solution_tested,
-                        ) = algorithm(
-                            graphs[max_edges][size], k, 80 * size**2 + 75000
+                    graph, pruned = prepare_graph(
+                        get_graph(max_edges, size),
+                        k,
+                        GRAPH_BACKEND,
+                        K_CORE_PREFILTER,
+                        name,
+                        Deadline(seconds),
+                    )
+                except TimeoutError:
+                    graph = None
+                if graph is None:
+                    outcome = setup_timeout(name, seconds)
+                elif name in EXACT_ALGORITHMS:
+                    outcome = measure_cell(
+                        algorithm, graph, k, seconds=seconds, profile_path=profile_path
+                    )
+                else:
+                    outcome = measure_cell(
+                        algorithm,
+                        graph,
+                        k,
+                        number_of_trials(size),
+                        seconds=seconds,
+                        profile_path=profile_path,
+                        **ALGORITHM_OPTIONS.get(name, {}),
+                    )
+
+                # Initialize results dictionary keys if needed
+                if k not in results:
+                    results[k] = {}
+                if max_edges not in results[k]:
+                    results[k][max_edges] = {}
+
+                if outcome.timed_out:
+                    log.warning(
+                        f"{name} algorithm timed out for graph with size {size}, clique size {k}, and density of edges {max_edges}"
+                    )
+                    results[k][max_edges][size] = timed_out_cell(outcome)
+                    append_checkpoint(
+                        checkpoint, (k, max_edges, size), results[k][max_edges][size]
+                    )
+                    break  # Saia do loop max_edges
+
+                results[k][max_edges][size] = {
+                    "result": outcome.result,
+                    "operations_count": outcome.operations,
+                    "time": outcome.time,
+                    "solution_tested": outcome.solutions_tested,
+                    **pruned,
+                    **benchmark_fields(outcome),
+                }
+
+                if outcome.function not in EXACT_ALGORITHMS:
+                    try:
+                        result_exhaustive = results_exhaustive[k][max_edges][size][
+                            "result"
+                        ]
+
+                        results[k][max_edges][size]["valid_result"] = validate_result(
+                            outcome.result, result_exhaustive
                         )
+                    except KeyError:
+                        results[k][max_edges][size][
+                            "valid_result"
+                        ] = "No valid result to compare"
+
+                append_checkpoint(
+                    checkpoint, (k, max_edges, size), results[k][max_edges][size]
+                )
+
+    pickle.dump(results, open(f"../results/pickle/{name}.pickle", "wb"))
+    convert_to_json(name, results, f"../results/json/{name}.json")
+    with ResultsStore() as store:
+        store.add_results(name, results)
+    clear_checkpoint(checkpoint)
+    log.info(f"Results for {name} algorithm saved to pickle, json and results store")
 
-                    # Cancel the timer if completed within time limit
-                    signal.alarm(0)
-
-                    # Initialize results dictionary keys if needed
-                    if k not in results:
-                        results[k] = {}
-                    if max_edges not in results[k]:
-                        results[k][max_edges] = {}
-                    if size not in results[k][max_edges]:
-                        results[k][max_edges][size] = {}
-
-                    results[k][max_edges][size] = {
-                        "result": result,
-                        "operations_count": operations_count,
-                        "time": time,
-                        "solution_tested": solution_tested,
+
+# Variante de run que responde a todos os k de uma só vez sobre cada grafo
+# (ver solve_k_values); o limite de tempo aplica-se ao grafo e não a cada k. As
+# células derivadas de outro k têm derived_from e ficam fora das séries e ajustes
+def run_all_k(algorithm, name):
+    if name not in EXACT_ALGORITHMS:
+        results_exhaustive = load_reference_results()
+
+    # Sem pré-filtro de k-core (o grafo é partilhado por todos os k)
+    checkpoint = checkpoint_path(name, GRAPH_BACKEND, mode="all_k")
+    done = load_checkpoint(checkpoint)
+
+    results = defaultdict(dict)
+    for k in k_values:
+        for max_edges in EDGES_DENSITY:
+            results[k][max_edges] = {}
+
+    for max_edges in EDGES_DENSITY:
+        # Valores de k cuja série ainda não ultrapassou o limite de tempo
+        active = list(k_values)
+        for size in SWEEP_SIZES:
+            pending = []
+            for k in list(active):
+                if (k, max_edges, size) not in done:
+                    pending.append(k)
+                    continue
+                results[k][max_edges][size] = done[(k, max_edges, size)]
+                if done[(k, max_edges, size)].get("timed_out"):
+                    active.remove(k)
+
+            if pending:
+                log.info(
+                    f"Running {name} algorithm for graph with size {size}, clique sizes {pending}, and density of edges {max_edges}"
+                )
+                graph, _ = prepare_graph(
+                    get_graph(max_edges, size), None, GRAPH_BACKEND
+                )
+                options = {}
+                if name not in EXACT_ALGORITHMS:
+                    options = {
+                        "num_trials": number_of_trials(size),
+                        **ALGORITHM_OPTIONS.get(name, {}),
                     }
 
-                    if algorithm_name != "exhaustive_clique_search":
+                answered = {}
+                # Um único prazo para todos os k deste grafo
+                deadline = Deadline(time_limit(name, size))
+                for k, outcome, derived_from in solve_k_values(
+                    graph, pending, algorithm, deadline=deadline, **options
+                ):
+                    if outcome.timed_out:
+                        answered[k] = timed_out_cell(outcome)
+                        continue
+                    answered[k] = {
+                        "result": outcome.result,
+                        "operations_count": outcome.operations,
+                        "time": outcome.time,
+                        "solution_tested": outcome.solutions_tested,
+                    }
+                    # Respondido pela execução de outro k: sem tempo nem operações próprios
+                    if derived_from is not None:
+                        answered[k]["derived_from"] = derived_from
+                unanswered = [
+                    k
+                    for k in pending
+                    if answered.get(k, {"timed_out": True}).get("timed_out")
+                ]
+                if unanswered:
+                    log.warning(
+                        f"{name} algorithm timed out for graph with size {size}, clique sizes {unanswered}, and density of edges {max_edges}"
+                    )
+
+                for k in pending:
+                    cell = answered.get(k, {"timed_out": True})
+                    if "timed_out" in cell:
+                        active.remove(k)
+                    elif name not in EXACT_ALGORITHMS:
                         try:
                             result_exhaustive = results_exhaustive[k][max_edges][size][
                                 "result"
                             ]
-
-                            if result is not None:
-                                results[k][max_edges][size]["valid_result"] = (
-                                    True if type(result_exhaustive) == tuple else False
-                                )
-                            else:
-                                results[k][max_edges][size]["valid_result"] = (
-                                    False if type(result_exhaustive) == tuple else True
-                                )
+                            cell["valid_result"] = validate_result(
+                                cell["result"], result_exhaustive
+                            )
                         except KeyError:
-                            results[k][max_edges][size][
-                                "valid_result"
-                            ] = "No valid result to compare"
+                            cell["valid_result"] = "No valid result to compare"
+                    results[k][max_edges][size] = cell
+                    append_checkpoint(checkpoint, (k, max_edges, size), cell)
 
-                except TimeoutError:
-                    log.warning(
-                        f"{name} algorithm timed out for graph with size {size}, clique size {k}, and density of edges {max_edges}"
-                    )
+            if not active:
+                break
 
-                    if k not in results:
-                        results[k] = {}
-                    if max_edges not in results[k]:
-                        results[k][max_edges] = {}
-                    if size not in results[k][max_edges]:
-                        results[k][max_edges][size] = {}
+    pickle.dump(results, open(f"../results/pickle/{name}.pickle", "wb"))
+    convert_to_json(name, results, f"../results/json/{name}.json")
+    with ResultsStore() as store:
+        store.add_results(name, results)
+    clear_checkpoint(checkpoint)
+    log.info(f"Results for {name} algorithm saved to pickle, json and results store")
 
-                    results[k][max_edges][size] = {
-                        "timed_out": True,
-                    }
 
-                    signal.alarm(0)  # Disable any alarm just in case
-                    break  # Saia do loop max_edges
+# Clique máximo de cada grafo (ver maximum_clique): esgotados os TIME_LIMIT segundos
+# guarda-se o melhor clique encontrado e o limite superior, com optimal=False
+def run_maximum_clique(name="maximum_clique"):
+    checkpoint = checkpoint_path(name, GRAPH_BACKEND)
+    done = load_checkpoint(checkpoint)
+
+    results = defaultdict(dict)
+    for max_edges in EDGES_DENSITY:
+        for size in SWEEP_SIZES:
+            if (max_edges, size) in done:
+                results[max_edges][size] = done[(max_edges, size)]
+                if not done[(max_edges, size)]["optimal"]:
+                    break
+                continue
+
+            log.info(
+                f"Running {name} for graph with size {size} and density of edges {max_edges}"
+            )
+            graph, _ = prepare_graph(get_graph(max_edges, size), None, GRAPH_BACKEND)
+
+            def report(clique, upper_bound):
+                log.info(
+                    f"Graph with size {size} and density of edges {max_edges}: best clique {len(clique)}, upper bound {upper_bound}"
+                )
+
+            outcome = maximum_clique(
+                graph, on_progress=report, deadline=Deadline(TIME_LIMIT)
+            )
+
+            results[max_edges][size] = {
+                "result": outcome.result,
+                "upper_bound": outcome.upper_bound,
+                "optimal": outcome.optimal,
+                "operations_count": outcome.operations,
+                "time": outcome.time,
+                "solution_tested": outcome.solutions_tested,
+            }
+            append_checkpoint(checkpoint, (max_edges, size), results[max_edges][size])
+
+            # Os tamanhos seguintes também não terminariam dentro do limite
+            if not outcome.optimal:
+                log.warning(
+                    f"{name} timed out for graph with size {size} and density of edges {max_edges}, keeping best clique found"
+                )
+                break
 
     pickle.dump(results, open(f"../results/pickle/{name}.pickle", "wb"))
-    convert_to_json(name, results, f"../results/json/{name}.json")
-    log.info(f"Results for {name} algorithm saved to pickle and json files")
+    with open(f"../results/json/{name}.json", "w") as json_file:
+        json.dump(results, json_file, indent=4)
+    clear_checkpoint(checkpoint)
+    log.info(f"Results for {name} saved to pickle and json files")
 
 
 # Função principal que executa todos os algoritmos
-def marathon():
-    algorithms = [
-        (exhaustive_clique_search, "exhaustive_clique_search"),
-        (random_sampling_clique, "random_sampling_clique"),
-        (monte_carlo_clique, "monte_carlo_clique"),
-        (monte_carlo_with_heuristic_clique, "monte_carlo_with_heuristic_clique"),
-        (las_vegas_clique, "las_vegas_clique"),
-        (randomized_heuristic_clique, "randomized_heuristic_clique"),
-    ]
-
-    # Executar todos os algoritmos
-    for algorithm, name in algorithms:
+def marathon(names=ALGORITHMS):
+    # Executar todos os algoritmos (ou só os de names)
+    for name in names:
+        algorithm = ALGORITHMS[name]
         # run(algorithm, name)
         SWlargeG(algorithm, name)
 
 
-def SWlargeG(algorithm, name):
-    graph = pickle.load(open("../graphs/SWlargeG.pickle", "rb"))
+@lru_cache(maxsize=1)
+def load_SWlargeG():
+    # O formato CSR (ver csr_graph.py) é mapeado em memória, sem desserialização;
+    # o grafo é carregado uma só vez e partilhado por todos os algoritmos e k
+    if os.path.isdir("../graphs/SWlargeG_csr"):
+        return load_csr("../graphs/SWlargeG_csr")
+    return pickle.load(open("../graphs/SWlargeG.pickle", "rb"))
 
-    if name != "exhaustive_clique_search":
-        results_exhaustive = pickle.load(
-            open(f"../results/pickle/SWlargeG_exhaustive_clique_search.pickle", "rb")
-        )
 
-    results = defaultdict(dict)
-    for k in k_values:
-        log.info(f"Running {name} algorithm for SWlargeG graph with clique size {k}")
-        try:
-            # Start the timer
-            signal.signal(signal.SIGALRM, timeout_handler)
-            if name == "exhaustive_clique_search":
-                signal.alarm(TIME_LIMIT)
-            else:
-                signal.alarm(50)
-
-            if name == "exhaustive_clique_search":
-                (
-                    algorithm_name,
-                    result,
-                    operations_count,
-                    time,
-                    solution_tested,
-                ) = algorithm(graph, k)
-            else:
-                (
-                    algorithm_name,
-                    result,
-                    operations_count,
-                    time,
-                    solution_tested,
-                ) = algorithm(graph, k, 80 * graph.size() ** 2 + 75000)
-
-            # Cancel the timer if completed within time limit
-            signal.alarm(0)
-
-            # Initialize results dictionary keys if needed
-            if k not in results:
-                results[k] = {}
-
-            results[k] = {
-                "result": result,
-                "operations_count": operations_count,
-                "time": time,
-                "solution_tested": solution_tested,
-            }
-
-            if algorithm_name != "exhaustive_clique_search":
-                try:
-                    result_exhaustive = results_exhaustive[k]["result"]
+def SWlargeG_cell(
+    algorithm, name, original_graph, k, backend=GRAPH_BACKEND, k_core_prefilter=False
+):
+    # A preparação do grafo tem o mesmo prazo que o algoritmo
+    seconds = TIME_LIMIT if name in EXACT_ALGORITHMS else 50
+    try:
+        graph, pruned = prepare_graph(
+            original_graph, k, backend, k_core_prefilter, name, Deadline(seconds)
+        )
+    except TimeoutError:
+        return timed_out_cell(setup_timeout(name, seconds))
+    if name in EXACT_ALGORITHMS:
+        outcome = measure_cell(algorithm, graph, k, seconds=seconds)
+    else:
+        outcome = measure_cell(
+            algorithm,
+            graph,
+            k,
+            number_of_trials(original_graph.size()),
+            seconds=seconds,
+        )
 
-                    if result is not None:
-                        results[k]["valid_result"] = (
-                            True if type(result_exhaustive) == tuple else False
-                        )
-                    else:
-                        results[k]["valid_result"] = (
-                            False if type(result_exhaustive) == tuple else True
-                        )
-                except KeyError:
-                    results[k]["valid_result"] = "No valid result to compare"
+    if outcome.timed_out:
+        return timed_out_cell(outcome)
+    return {
+        "result": outcome.result,
+        "operations_count": outcome.operations,
+        "time": outcome.time,
+        "solution_tested": outcome.solutions_tested,
+        **pruned,
+        **benchmark_fields(outcome),
+    }
 
-        except TimeoutError:
-            log.warning(
-                f"{name} algorithm timed out for SWlargeG graph with clique size {k}"
-            )
 
-            if k not in results:
-                results[k] = {}
+def validate_SWlargeG_cell(name, k, cell, results_exhaustive):
+    if name in EXACT_ALGORITHMS or cell.get("timed_out"):
+        return
+    try:
+        result_exhaustive = results_exhaustive[k]["result"]
 
-            results[k] = {
-                "timed_out": True,
-            }
+        cell["valid_result"] = validate_result(cell["result"], result_exhaustive)
+    except KeyError:
+        cell["valid_result"] = "No valid result to compare"
 
-            signal.alarm(0)  # Disable any alarm just in case
 
+def save_SWlargeG_results(name, results):
     pickle.dump(results, open(f"../results/pickle/SWlargeG_{name}.pickle", "wb"))
+    with ResultsStore() as store:
+        store.add_large_graph_results(name, results)
 
     file_path = f"../results/json/SWlargeG_{name}.json"
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
@@ -239,8 +387,56 @@ def SWlargeG(algorithm, name):
             indent=4,
         )
 
-    log.info(f"Results for {name} algorithm saved to pickle and json files")
+    log.info(f"Results for {name} algorithm saved to pickle, json and results store")
+
+
+def SWlargeG(algorithm, name):
+    original_graph = load_SWlargeG()
+
+    results_exhaustive = {}
+    if name not in EXACT_ALGORITHMS:
+        results_exhaustive = load_reference_results("SWlargeG_")
+
+    checkpoint = checkpoint_path(f"SWlargeG_{name}", GRAPH_BACKEND, K_CORE_PREFILTER)
+    done = load_checkpoint(checkpoint)
+
+    results = defaultdict(dict)
+    for k in k_values:
+        if k in done:
+            results[k] = done[k]
+            continue
+
+        log.info(f"Running {name} algorithm for SWlargeG graph with clique size {k}")
+        results[k] = SWlargeG_cell(
+            algorithm, name, original_graph, k, GRAPH_BACKEND, K_CORE_PREFILTER
+        )
+        if results[k].get("timed_out"):
+            log.warning(
+                f"{name} algorithm timed out for SWlargeG graph with clique size {k}"
+            )
+        validate_SWlargeG_cell(name, k, results[k], results_exhaustive)
+        append_checkpoint(checkpoint, k, results[k])
+
+    save_SWlargeG_results(name, results)
+    clear_checkpoint(checkpoint)
 
 
 if __name__ == "__main__":
-    marathon()
+    parser = argparse.ArgumentParser(
+        description="Corre marathon ou, com --all-k, a grelha com run_all_k"
+    )
+    parser.add_argument(
+        "--all-k",
+        action="store_true",
+        help="responde a todos os k de cada grafo de uma só vez (ver run_all_k)",
+    )
+    parser.add_argument(
+        "--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS)
+    )
+    args = parser.parse_args()
+
+    if args.all_k:
+        for name in args.algorithms:
+            run_all_k(ALGORITHMS[name], name)
+    else:
+        marathon(args.algorithms)
@@ -0,0 +1,95 @@
+from multiprocessing import shared_memory
+import numpy as np
+from bitset_graph import packed_rows
+from csr_graph import CSRGraph, csr_arrays
+
+# Acima deste tamanho (bytes) a matriz de bits não é publicada: em SWlargeG
+# (~700k vértices) ocuparia dezenas de GB
+SHARED_BITS_MAX_BYTES = 1 << 30
+
+# Grafos já ligados neste processo: chave do registo -> (CSRGraph, blocos)
+attached = {}
+
+
+class GraphRegistry:
+    """Publica grafos (CSR, graus e bits) em memória partilhada, uma vez por grafo.
+
+    Os processos trabalhadores recebem só o descritor de cada grafo (nomes dos
+    blocos, formas e tipos) e ligam-se com attach_graph, sem copiar os arrays:
+    a memória dos arrays CSR não cresce com o número de trabalhadores.
+
+    A matriz de bits (uma linha np.packbits por vértice, ver packed_rows) serve
+    as_bitset_graph e has_edge em todos os trabalhadores. Só é publicada até
+    SHARED_BITS_MAX_BYTES; acima disso (SWlargeG) o BitsetGraph e os sets de
+    has_edge continuam a ser construídos por processo.
+    """
+
+    def __init__(self):
+        self.blocks = []
+        self.descriptors = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def publish(self, key, graph):
+        if key in self.descriptors:
+            return self.descriptors[key]
+
+        offsets, neighbor_indices, labels = csr_arrays(graph)
+        arrays = {
+            "offsets": offsets,
+            "neighbor_indices": neighbor_indices,
+            "degrees": np.diff(offsets),
+        }
+        n = len(offsets) - 1
+        if n * ((n + 7) // 8) <= SHARED_BITS_MAX_BYTES:
+            arrays["adjacency_bits"] = packed_rows(offsets, neighbor_indices)
+        descriptor = {"key": key, "arrays": {}, "labels": None}
+        # Labels não numéricos (por exemplo strings) vão no próprio descritor
+        if labels is not None and labels.dtype.kind in "iuf":
+            arrays["labels"] = labels
+        else:
+            descriptor["labels"] = labels
+
+        for field, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self.blocks.append(block)
+            descriptor["arrays"][field] = (block.name, array.shape, array.dtype.str)
+
+        self.descriptors[key] = descriptor
+        return descriptor
+
+    def close(self):
+        # Só o processo que publicou liberta os blocos
+        attached.clear()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        self.descriptors = {}
+
+
+def attach_graph(descriptor):
+    """CSRGraph sobre os blocos partilhados de descriptor (ligado uma vez por processo)."""
+    key = descriptor["key"]
+    if key in attached:
+        return attached[key][0]
+
+    blocks = []
+    arrays = {"labels": descriptor["labels"]}
+    for field, (name, shape, dtype) in descriptor["arrays"].items():
+        block = shared_memory.SharedMemory(name=name)
+        array = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+        # Só leitura: os algoritmos nunca alteram o grafo
+        array.flags.writeable = False
+        arrays[field] = array
+        blocks.append(block)
+
+    # Os blocos ficam referenciados enquanto os arrays estiverem em uso
+    attached[key] = (CSRGraph(**arrays), blocks)
+    return attached[key][0]
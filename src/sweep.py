@@ -0,0 +1,377 @@
+import argparse
+import json
+import os
+import pickle
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from algorithms import ALGORITHMS
+from profiling import cell_profile_path
+from results_store import ResultsStore
+from run import (
+    SWlargeG_cell,
+    load_SWlargeG,
+    save_SWlargeG_results,
+    validate_SWlargeG_cell,
+)
+from shared_graph import GraphRegistry, attach_graph
+from utils import (
+    ALGORITHM_OPTIONS,
+    EDGES_DENSITY,
+    EXACT_ALGORITHMS,
+    K_VALUES,
+    SWEEP_SIZES,
+    Deadline,
+    log,
+    append_checkpoint,
+    benchmark_fields,
+    checkpoint_path,
+    clear_checkpoint,
+    convert_to_json,
+    load_checkpoint,
+    get_graph,
+    load_reference_results,
+    measure_cell,
+    number_of_trials,
+    prepare_graph,
+    setup_timeout,
+    time_limit,
+    timed_out_cell,
+    validate_result,
+)
+
+# Tarefas que falharam na última execução (exceção ou trabalhador terminado)
+FAILURES_PATH = "../results/failures.json"
+
+# Configuração de cada processo trabalhador (definida em init_worker); graph é o
+# descritor do grafo publicado em memória partilhada (ver shared_graph.py)
+worker_options = {
+    "backend": "networkx",
+    "k_core_prefilter": False,
+    "profile_dir": None,
+    "graph": None,
+}
+
+
+def init_worker(backend, k_core_prefilter, profile_dir=None, graph=None):
+    worker_options["backend"] = backend
+    worker_options["k_core_prefilter"] = k_core_prefilter
+    worker_options["profile_dir"] = profile_dir
+    worker_options["graph"] = graph
+
+
+def run_task(task):
+    name, k, max_edges, size = task
+    algorithm = ALGORITHMS[name]
+
+    # A preparação do grafo tem o mesmo prazo que o algoritmo
+    seconds = time_limit(name, size)
+    try:
+        graph, pruned = prepare_graph(
+            get_graph(max_edges, size),
+            k,
+            worker_options["backend"],
+            worker_options["k_core_prefilter"],
+            name,
+            Deadline(seconds),
+        )
+    except TimeoutError:
+        return task, timed_out_cell(setup_timeout(name, seconds))
+
+    profile_path = None
+    if worker_options["profile_dir"]:
+        profile_path = cell_profile_path(
+            worker_options["profile_dir"], name, k, max_edges, size
+        )
+    if name in EXACT_ALGORITHMS:
+        outcome = measure_cell(
+            algorithm, graph, k, seconds=seconds, profile_path=profile_path
+        )
+    else:
+        outcome = measure_cell(
+            algorithm,
+            graph,
+            k,
+            number_of_trials(size),
+            seconds=seconds,
+            profile_path=profile_path,
+            **ALGORITHM_OPTIONS.get(name, {}),
+        )
+
+    if outcome.timed_out:
+        return task, timed_out_cell(outcome)
+    return task, {
+        "result": outcome.result,
+        "operations_count": outcome.operations,
+        "time": outcome.time,
+        "solution_tested": outcome.solutions_tested,
+        **pruned,
+        **benchmark_fields(outcome),
+    }
+
+
+def task_outcome(future, task, failures):
+    """Resultado de future, ou None se a tarefa falhou (registada em failures).
+
+    Uma falha não interrompe as restantes tarefas; como não vai para o
+    checkpoint, a tarefa é repetida na próxima execução.
+    """
+    try:
+        return future.result()
+    except Exception as error:
+        log.error(f"Task {task} failed: {error!r}")
+        failures[task] = repr(error)
+        return None
+
+
+def save_failures(failures):
+    with open(FAILURES_PATH, "w") as f:
+        json.dump(
+            [{"task": list(task), "error": error} for task, error in failures.items()],
+            f,
+            indent=4,
+        )
+    if failures:
+        log.warning(f"{len(failures)} tasks failed, see {FAILURES_PATH}")
+
+
+def collect_results(name, cells, results_exhaustive):
+    grouped = defaultdict(lambda: defaultdict(dict))
+    for (k, max_edges, size), cell in cells.items():
+        grouped[k][max_edges][size] = cell
+
+    # Mesma estrutura que run.run: results[k][max_edges][size], parando no primeiro timeout
+    results = defaultdict(dict)
+    for k in sorted(grouped):
+        for max_edges in EDGES_DENSITY:
+            if max_edges not in grouped[k]:
+                continue
+            results[k][max_edges] = {}
+            for size in sorted(grouped[k][max_edges]):
+                cell = grouped[k][max_edges][size]
+                results[k][max_edges][size] = cell
+                if cell.get("timed_out"):
+                    break
+                if name not in EXACT_ALGORITHMS:
+                    try:
+                        result_exhaustive = results_exhaustive[k][max_edges][size][
+                            "result"
+                        ]
+                        cell["valid_result"] = validate_result(
+                            cell["result"], result_exhaustive
+                        )
+                    except KeyError:
+                        cell["valid_result"] = "No valid result to compare"
+    return results
+
+
+def parallel_sweep(
+    names,
+    workers=None,
+    k_values=K_VALUES,
+    densities=EDGES_DENSITY,
+    sizes=SWEEP_SIZES,
+    backend="networkx",
+    k_core_prefilter=False,
+    profile_dir=None,
+):
+    # Células já concluídas numa execução anterior interrompida
+    cells = {
+        name: load_checkpoint(checkpoint_path(name, backend, k_core_prefilter))
+        for name in names
+    }
+    first_timeout = {}
+    for name in names:
+        for (k, max_edges, size), cell in cells[name].items():
+            if cell.get("timed_out"):
+                key = (name, k, max_edges)
+                first_timeout[key] = min(size, first_timeout.get(key, size))
+
+    # Tamanhos pequenos primeiro, para que os timeouts cancelem cedo os tamanhos maiores
+    tasks = [
+        (name, k, max_edges, size)
+        for size in sizes
+        for name in names
+        for k in k_values
+        for max_edges in densities
+        if (k, max_edges, size) not in cells[name]
+        and size < first_timeout.get((name, k, max_edges), size + 1)
+    ]
+    pending = defaultdict(list)
+    failures = {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(backend, k_core_prefilter, profile_dir),
+    ) as executor:
+        futures = {}
+        for task in tasks:
+            future = executor.submit(run_task, task)
+            futures[future] = task
+            pending[task[:3]].append((task[3], future))
+
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            outcome = task_outcome(future, futures[future], failures)
+            if outcome is None:
+                continue
+            (name, k, max_edges, size), cell = outcome
+            cells[name][(k, max_edges, size)] = cell
+            append_checkpoint(
+                checkpoint_path(name, backend, k_core_prefilter),
+                (k, max_edges, size),
+                cell,
+            )
+            log.info(
+                f"Finished {name} for graph with size {size}, clique size {k}, and density of edges {max_edges}"
+            )
+
+            if cell.get("timed_out"):
+                log.warning(
+                    f"{name} algorithm timed out for graph with size {size}, clique size {k}, and density of edges {max_edges}"
+                )
+                for other_size, other_future in pending[(name, k, max_edges)]:
+                    if other_size > size:
+                        other_future.cancel()
+    save_failures(failures)
+
+    all_results = {}
+    for name in names:
+        if name in EXACT_ALGORITHMS:
+            results_exhaustive = {}
+        elif any(exact in names for exact in EXACT_ALGORITHMS):
+            # Referência calculada nesta mesma execução
+            exact = [e for e in reversed(EXACT_ALGORITHMS) if e in names][0]
+            results_exhaustive = collect_results(exact, cells[exact], {})
+        else:
+            results_exhaustive = load_reference_results()
+        all_results[name] = collect_results(name, cells[name], results_exhaustive)
+    return all_results
+
+
+def run_large_graph_task(task):
+    name, k = task
+    # A primeira tarefa de cada trabalhador liga-se ao grafo; as seguintes reutilizam-no
+    graph = attach_graph(worker_options["graph"])
+    return task, SWlargeG_cell(
+        ALGORITHMS[name],
+        name,
+        graph,
+        k,
+        worker_options["backend"],
+        worker_options["k_core_prefilter"],
+    )
+
+
+def parallel_large_graph(
+    names, workers=None, k_values=K_VALUES, backend="networkx", k_core_prefilter=False
+):
+    """Corre run.SWlargeG para vários algoritmos e k em paralelo.
+
+    O grafo é carregado uma vez e publicado em memória partilhada; os
+    trabalhadores recebem só o descritor e não copiam a adjacência.
+    """
+    cells = {
+        name: load_checkpoint(
+            checkpoint_path(f"SWlargeG_{name}", backend, k_core_prefilter)
+        )
+        for name in names
+    }
+    tasks = [(name, k) for name in names for k in k_values if k not in cells[name]]
+    failures = {}
+
+    with GraphRegistry() as registry:
+        descriptor = registry.publish("SWlargeG", load_SWlargeG())
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(backend, k_core_prefilter, None, descriptor),
+        ) as executor:
+            futures = {
+                executor.submit(run_large_graph_task, task): task for task in tasks
+            }
+            for future in as_completed(futures):
+                outcome = task_outcome(future, futures[future], failures)
+                if outcome is None:
+                    continue
+                (name, k), cell = outcome
+                cells[name][k] = cell
+                append_checkpoint(
+                    checkpoint_path(f"SWlargeG_{name}", backend, k_core_prefilter),
+                    k,
+                    cell,
+                )
+                if cell.get("timed_out"):
+                    log.warning(
+                        f"{name} algorithm timed out for SWlargeG graph with clique size {k}"
+                    )
+                else:
+                    log.info(f"Finished {name} for SWlargeG graph with clique size {k}")
+    save_failures(failures)
+
+    exact = [e for e in reversed(EXACT_ALGORITHMS) if e in names]
+    if exact:
+        results_exhaustive = cells[exact[0]]
+    else:
+        results_exhaustive = load_reference_results("SWlargeG_")
+    for name in names:
+        results = {k: cells[name][k] for k in sorted(cells[name])}
+        for k, cell in results.items():
+            validate_SWlargeG_cell(name, k, cell, results_exhaustive)
+        save_SWlargeG_results(name, results)
+        clear_checkpoint(checkpoint_path(f"SWlargeG_{name}", backend, k_core_prefilter))
+
+
+def save_results(all_results, backend="networkx", k_core_prefilter=False):
+    for name, results in all_results.items():
+        pickle.dump(results, open(f"../results/pickle/{name}.pickle", "wb"))
+        convert_to_json(name, results, f"../results/json/{name}.json")
+        with ResultsStore() as store:
+            store.add_results(name, results)
+        clear_checkpoint(checkpoint_path(name, backend, k_core_prefilter))
+        log.info(
+            f"Results for {name} algorithm saved to pickle, json and results store"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Corre a grelha k x densidade x tamanho em paralelo"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--algorithms", nargs="+", default=list(ALGORITHMS), choices=list(ALGORITHMS)
+    )
+    parser.add_argument("--backend", default="networkx", choices=["networkx", "bitset"])
+    parser.add_argument("--k-core", action="store_true")
+    parser.add_argument(
+        "--profile-dir",
+        help="grava o cProfile e as fases de cada célula (agregar com profiling.py)",
+    )
+    parser.add_argument(
+        "--large-graph",
+        action="store_true",
+        help="corre SWlargeG (todos os k) em vez da grelha, com o grafo partilhado",
+    )
+    args = parser.parse_args()
+
+    if args.large_graph:
+        parallel_large_graph(
+            args.algorithms,
+            workers=args.workers,
+            backend=args.backend,
+            k_core_prefilter=args.k_core,
+        )
+    else:
+        save_results(
+            parallel_sweep(
+                args.algorithms,
+                workers=args.workers,
+                backend=args.backend,
+                k_core_prefilter=args.k_core,
+                profile_dir=args.profile_dir,
+            ),
+            args.backend,
+            args.k_core,
+        )
@@ -1,8 +1,17 @@
+import hashlib
 import json
-from time import time
+import os
+import random
+import tracemalloc
+from functools import lru_cache, wraps
+from time import perf_counter, perf_counter_ns
 import networkx as nx
+import numpy as np
 from collections import namedtuple
 import logging, pickle
+from bitset_graph import as_bitset_graph, dense_adjacency
+from preprocessing import k_core_reduction
+from profiling import profile_call
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 log = logging.getLogger(__name__)
@@ -10,16 +19,87 @@ log = logging.getLogger(__name__)
 EDGES_DENSITY = [0.75, 0.5, 0.25, 0.125]
 SEED = 107637
 SIZES = 1000
+# Tamanhos percorridos: todos até 300, depois de 5 em 5
+SWEEP_SIZES = list(range(1, 301)) + list(range(305, SIZES + 1, 5))
+# Lista de valores de clique de tamanho k que estamos procurando
+K_VALUES = [5, 6, 7, 8, 9, 10, 15]
+TIME_LIMIT = 100
+# Limite mínimo de cada célula dos algoritmos aleatórios (ver time_limit)
+MIN_TIME_LIMIT = 1.0
+# Argumentos extra passados a cada algoritmo aleatório na grelha de grafos gerados
+# (run.run e sweep.py); nunca no SWlargeG, onde o modo em lote não cabe em memória
+ALGORITHM_OPTIONS = {"random_sampling_clique": {"batch_size": 4096}}
+# O modo em lote de random_sampling_clique usa uma matriz de adjacência n x n: acima
+# de BATCH_MAX_NODES vértices, ou com menos de BATCH_MIN_RATIO * k, usa o ciclo simples
+BATCH_MAX_NODES = 4096
+BATCH_MIN_RATIO = 2
+# Número de grafos mantidos em memória por get_graph
+GRAPH_CACHE_SIZE = 8
+# Medições por célula em run.py e sweep.py (ver repeat_benchmark); com 1 repetição,
+# sem aquecimento e sem memória, cada célula é uma única execução
+BENCHMARK_REPEATS = 1
+BENCHMARK_WARMUP = 0
+# Sementes de random usadas em rotação pelas repetições (None: não altera o estado)
+BENCHMARK_SEEDS = None
+TRACK_MEMORY = False
+# Algoritmos exatos: servem de referência para o campo valid_result
+EXACT_ALGORITHMS = ["exhaustive_clique_search", "branch_and_bound_clique_search"]
+# Algoritmos que trabalham sobre BitsetGraph: a conversão é feita em prepare_graph
+BITSET_ALGORITHMS = ["branch_and_bound_clique_search", "las_vegas_clique"]
 
+# timed_out indica que o algoritmo parou por ter esgotado o Deadline recebido
 Result = namedtuple(
-    "Result", ["function", "result", "operations", "time", "solutions_tested"]
+    "Result",
+    ["function", "result", "operations", "time", "solutions_tested", "timed_out"],
+    defaults=(False,),
 )
+# Resultado de maximum_clique: o maior clique encontrado e um limite superior do máximo
+MaximumCliqueResult = namedtuple(
+    "MaximumCliqueResult", Result._fields + ("upper_bound", "optimal")
+)
+# Resultado de repeat_benchmark: time é a mediana das repetições, peak_memory em bytes
+BenchmarkResult = namedtuple(
+    "BenchmarkResult",
+    Result._fields
+    + ("repeats", "time_median", "time_q1", "time_q3", "time_min", "peak_memory"),
+)
+
+
+class Deadline:
+    """Limite de tempo cooperativo, consultado pelos algoritmos nos seus ciclos.
+
+    Ao contrário do SIGALRM, funciona em qualquer thread e com precisão abaixo do
+    segundo; cancel() interrompe o algoritmo a partir de outra thread. Sem
+    segundos (ou com 0) não há limite.
+    """
+
+    def __init__(self, seconds=None):
+        self.end = perf_counter() + seconds if seconds else None
+        self.cancelled = False
+        # Passa a True quando um algoritmo observa o fim do prazo
+        self.triggered = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expired(self):
+        if not self.triggered:
+            self.triggered = self.cancelled or (
+                self.end is not None and perf_counter() >= self.end
+            )
+        return self.triggered
 
 
 def generate_random_graph(seed=SEED, size=10, maximum_number_edges=0.8):
     return nx.fast_gnp_random_graph(size, maximum_number_edges, seed=seed)
 
 
+@lru_cache(maxsize=GRAPH_CACHE_SIZE)
+def get_graph(maximum_number_edges, size):
+    # Os grafos da grelha são determinísticos a partir de SEED: gera-se só o que é preciso
+    return generate_random_graph(SEED, size, maximum_number_edges)
+
+
 def generate_all_graphs():
     all_graphs = {}
     for maximum_number_edges in EDGES_DENSITY:
@@ -40,17 +120,254 @@ def save_graphs():
     pickle.dump(graphs, open("../graphs/all_graphs.pickle", "wb"))
 
 
+def time_limit(name, size):
+    # Em segundos, com fração (o Deadline não precisa de inteiros como o signal.alarm);
+    # nunca abaixo de MIN_TIME_LIMIT, para que os grafos pequenos também tenham limite
+    if name in EXACT_ALGORITHMS:
+        return TIME_LIMIT
+    return max(1 / 1700 * size**2 + 0.8, MIN_TIME_LIMIT)
+
+
+def number_of_trials(size):
+    return 80 * size**2 + 75000
+
+
+def prepare_graph(
+    graph, k, backend="networkx", k_core_prefilter=False, name=None, deadline=None
+):
+    # A redução e a conversão são feitas fora do tempo medido pelo benchmark; os
+    # algoritmos de BITSET_ALGORITHMS recebem sempre o grafo já em bitset. Com
+    # deadline, a conversão lança TimeoutError se o prazo expirar (ver setup_timeout)
+    pruned = {}
+    if k_core_prefilter:
+        reduction = k_core_reduction(graph, k)
+        graph = reduction.graph
+        pruned = {
+            "pruned_nodes": reduction.pruned_nodes,
+            "pruned_edges": reduction.pruned_edges,
+        }
+    if backend == "bitset" or name in BITSET_ALGORITHMS:
+        graph = as_bitset_graph(graph, deadline)
+    # A matriz do modo em lote fica guardada com o grafo (ver dense_adjacency)
+    batch_size = ALGORITHM_OPTIONS.get(name, {}).get("batch_size")
+    if k is not None and batch_mode(len(graph), k, batch_size):
+        dense_adjacency(graph, deadline)
+    return graph, pruned
+
+
+def batch_mode(size, k, batch_size):
+    # random_sampling_clique com batch_size corre em lote num grafo de size vértices?
+    return bool(batch_size) and BATCH_MIN_RATIO * k <= size <= BATCH_MAX_NODES
+
+
+def setup_timeout(name, seconds):
+    # Result de uma célula cujo prazo se esgotou em prepare_graph, antes do algoritmo
+    return Result(name, None, 0, seconds, 0, True)
+
+
+def load_reference_results(prefix=""):
+    # Usa o resultado exato mais completo disponível (branch and bound chega a mais tamanhos)
+    for name in reversed(EXACT_ALGORITHMS):
+        path = f"../results/pickle/{prefix}{name}.pickle"
+        if os.path.exists(path):
+            return pickle.load(open(path, "rb"))
+    return {}
+
+
+def validate_result(result, result_exhaustive):
+    # Correto se concordar com o algoritmo exato quanto à existência do clique
+    return (result is not None) == (result_exhaustive is not None)
+
+
+def run_config(name, backend="networkx", k_core_prefilter=False, mode="per_k"):
+    # Tudo o que altera as medições de uma célula de name; mode é "per_k" (um prazo
+    # por k, run.run e sweep.py) ou "all_k" (um prazo por grafo, run.run_all_k)
+    return {
+        "mode": mode,
+        "backend": backend,
+        "k_core_prefilter": k_core_prefilter,
+        "options": ALGORITHM_OPTIONS.get(name, {}),
+        "time_limit": TIME_LIMIT,
+        "repeats": BENCHMARK_REPEATS,
+        "warmup": BENCHMARK_WARMUP,
+        "seeds": BENCHMARK_SEEDS,
+        "track_memory": TRACK_MEMORY,
+    }
+
+
+def checkpoint_path(name, backend="networkx", k_core_prefilter=False, mode="per_k"):
+    # A configuração entra no nome do ficheiro: uma execução retomada com outra
+    # configuração começa do zero em vez de misturar células das duas
+    config = json.dumps(
+        run_config(name, backend, k_core_prefilter, mode), sort_keys=True
+    )
+    tag = hashlib.sha1(config.encode()).hexdigest()[:10]
+    return f"../results/checkpoints/{name}_{tag}.pickle"
+
+
+def load_checkpoint(path):
+    # Registos (chave, resultado) acrescentados um a um durante a execução
+    cells = {}
+    if not os.path.exists(path):
+        return cells
+
+    with open(path, "rb+") as f:
+        last_complete = 0
+        while True:
+            try:
+                key, cell = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                # Último registo incompleto (execução interrompida a meio da escrita)
+                if os.path.getsize(path) > last_complete:
+                    log.warning(f"Discarding incomplete record at the end of {path}")
+                    f.truncate(last_complete)
+                break
+            cells[key] = cell
+            last_complete = f.tell()
+    return cells
+
+
+def append_checkpoint(path, key, cell):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        pickle.dump((key, cell), f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def clear_checkpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def timed_out_cell(outcome):
+    # Num timeout não há resultado: guardam-se as contagens até ao fim do prazo
+    return {
+        "timed_out": True,
+        "operations_count": outcome.operations,
+        "time": outcome.time,
+        "solution_tested": outcome.solutions_tested,
+    }
+
+
 def benchmark(func):
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        start = time()
+        start = perf_counter_ns()
         result, operations, solutions_tested = func(*args, **kwargs)
-        end = time()
+        end = perf_counter_ns()
 
-        return Result(func.__name__, result, operations, end - start, solutions_tested)
+        # Sem resultado e com o prazo esgotado: Result parcial com o trabalho feito até aí
+        deadline = kwargs.get("deadline")
+        timed_out = result is None and deadline is not None and deadline.triggered
+        return Result(
+            func.__name__,
+            result,
+            operations,
+            (end - start) / 1e9,
+            solutions_tested,
+            timed_out,
+        )
 
     return wrapper
 
 
+def repeat_benchmark(
+    algorithm,
+    *args,
+    repeats=5,
+    warmup=1,
+    seeds=None,
+    track_memory=False,
+    seconds=None,
+    **kwargs,
+):
+    """Mede um algoritmo decorado com benchmark em várias repetições.
+
+    As warmup primeiras execuções não contam. A repetição i usa a semente
+    seeds[i % len(seeds)]. Cada execução tem o seu Deadline de seconds, e um
+    timeout em qualquer delas devolve esse Result parcial. Com track_memory, o pico
+    de memória (tracemalloc) é medido numa execução extra, fora das medições de tempo.
+    """
+
+    def measure(i):
+        if seeds:
+            random.seed(seeds[i % len(seeds)])
+        return algorithm(*args, deadline=Deadline(seconds), **kwargs)
+
+    for i in range(warmup):
+        outcome = measure(i)
+        if outcome.timed_out:
+            return outcome
+
+    outcomes = []
+    for i in range(repeats):
+        outcome = measure(i)
+        if outcome.timed_out:
+            return outcome
+        outcomes.append(outcome)
+
+    peak_memory = None
+    if track_memory:
+        tracemalloc.start()
+        try:
+            measure(0)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    times = np.array([outcome.time for outcome in outcomes])
+    q1, median, q3 = np.percentile(times, [25, 50, 75]).tolist()
+    return BenchmarkResult(
+        *outcomes[0]._replace(time=median),
+        repeats,
+        median,
+        q1,
+        q3,
+        float(times.min()),
+        peak_memory,
+    )
+
+
+def measure_cell(algorithm, *args, seconds=None, profile_path=None, **kwargs):
+    # Uma célula de run.py / sweep.py com a configuração BENCHMARK_* acima; com
+    # profile_path grava também o cProfile e as fases da célula (ver profiling.py)
+    if profile_path is not None:
+        return profile_call(
+            profile_path,
+            measure_cell,
+            algorithm,
+            *args,
+            seconds=seconds,
+            **kwargs,
+        )
+    return repeat_benchmark(
+        algorithm,
+        *args,
+        repeats=BENCHMARK_REPEATS,
+        warmup=BENCHMARK_WARMUP,
+        seeds=BENCHMARK_SEEDS,
+        track_memory=TRACK_MEMORY,
+        seconds=seconds,
+        **kwargs,
+    )
+
+
+# Campos de repeat_benchmark guardados em cada célula quando há mais do que uma medição
+BENCHMARK_FIELDS = ("repeats", "time_median", "time_q1", "time_q3", "time_min")
+
+
+def benchmark_fields(outcome):
+    if not isinstance(outcome, BenchmarkResult):
+        return {}
+    fields = {}
+    if outcome.repeats > 1:
+        fields = {field: getattr(outcome, field) for field in BENCHMARK_FIELDS}
+    if outcome.peak_memory is not None:
+        fields["peak_memory"] = outcome.peak_memory
+    return fields
+
+
 def import_data(file):
     return pickle.load(open(f"{file}", "rb"))
 
@@ -64,10 +381,13 @@ def convert_to_json(alg_name, data, path, mode="all"):
                 new_data[k][max_edges] = {}
                 for size, results in sizes_dict.items():
                     if results.get("timed_out"):
-                        # If timed out, only include the timed_out field
+                        # If timed out, only include the timed_out field and the partial counts
                         new_data[k][max_edges][size] = {
                             "timed_out": True,
                         }
+                        for field in ("operations_count", "time", "solution_tested"):
+                            if field in results:
+                                new_data[k][max_edges][size][field] = results[field]
                     else:
                         # Otherwise, include all results
                         new_data[k][max_edges][size] = {
@@ -76,10 +396,19 @@ def convert_to_json(alg_name, data, path, mode="all"):
                             "time": results["time"],
                             "solution_tested": results["solution_tested"],
                         }
-                        if alg_name != "exhaustive_clique_search":
+                        if alg_name not in EXACT_ALGORITHMS:
                             new_data[k][max_edges][size]["valid_result"] = results[
                                 "valid_result"
                             ]
+                        for field in (
+                            "derived_from",
+                            "pruned_nodes",
+                            "pruned_edges",
+                            *BENCHMARK_FIELDS,
+                            "peak_memory",
+                        ):
+                            if field in results:
+                                new_data[k][max_edges][size][field] = results[field]
     else:
         for k, results in data.items():
             new_data[k] = {